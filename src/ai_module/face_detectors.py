@@ -0,0 +1,159 @@
+import cv2
+import numpy as np
+import logging
+import os
+import sys
+from pathlib import Path
+
+# Modül yolunu ayarlama
+sys.path.append(str(Path(__file__).parent.parent))
+from ai_module.frame import Frame
+
+logger = logging.getLogger(__name__)
+
+# Varsayılan dedektör: mtcnn, haar, opencv-dnn; "coarse:" öneki kaba-ince modu açar (örn. coarse:mtcnn)
+DEFAULT_DETECTOR = os.getenv("FACE_DETECTOR", "mtcnn")
+MODELS_DIR = Path(__file__).parent.parent.parent / 'data' / 'models'
+
+class FaceDetector:
+    """Dedektör arayüzü; detect() MTCNN ile aynı biçimde sonuç döndürür
+
+    Her sonuç {'box': [x, y, w, h], 'confidence': float, 'keypoints': dict} sözlüğüdür.
+    """
+
+    name = "base"
+
+    def detect(self, frame):
+        raise NotImplementedError
+
+class MTCNNDetector(FaceDetector):
+    """MTCNN (en doğru, CPU'da en yavaş)"""
+
+    name = "mtcnn"
+
+    def __init__(self, min_face_size: int = 60):
+        from mtcnn import MTCNN
+        self.detector = MTCNN(min_face_size=min_face_size)
+
+    def detect(self, frame):
+        return self.detector.detect_faces(Frame.wrap(frame).rgb)
+
+class HaarCascadeDetector(FaceDetector):
+    """OpenCV ile gelen Haar kaskadı (ağ/model indirmesi gerektirmez, çok hızlı)
+
+    Haar kalibre edilmiş güven skoru üretmez; bulunan her yüz 1.0 güvenle döner,
+    yanlış pozitifler min_neighbors ile kontrol edilir.
+    """
+
+    name = "haar"
+
+    def __init__(self, min_face_size: int = 60, scale_factor: float = 1.1, min_neighbors: int = 5):
+        cascade_path = os.path.join(cv2.data.haarcascades, "haarcascade_frontalface_default.xml")
+        self.classifier = cv2.CascadeClassifier(cascade_path)
+        self.min_face_size = min_face_size
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+
+    def detect(self, frame):
+        boxes = self.classifier.detectMultiScale(
+            Frame.wrap(frame).gray,
+            scaleFactor=self.scale_factor,
+            minNeighbors=self.min_neighbors,
+            minSize=(self.min_face_size, self.min_face_size)
+        )
+        return [
+            {"box": [int(x), int(y), int(w), int(h)], "confidence": 1.0, "keypoints": {}}
+            for x, y, w, h in boxes
+        ]
+
+class OpenCVDNNDetector(FaceDetector):
+    """OpenCV DNN ile ResNet-10 SSD yüz dedektörü
+
+    Model dosyaları (deploy.prototxt, res10_300x300_ssd_iter_140000.caffemodel)
+    opencv-python paketinde gelmez; data/models altına konulmalıdır.
+    """
+
+    name = "opencv-dnn"
+
+    def __init__(self, min_face_size: int = 60, models_dir: Path = MODELS_DIR, score_threshold: float = 0.5):
+        prototxt = Path(models_dir) / "deploy.prototxt"
+        weights = Path(models_dir) / "res10_300x300_ssd_iter_140000.caffemodel"
+        if not prototxt.exists() or not weights.exists():
+            raise FileNotFoundError(f"OpenCV DNN yüz modeli bulunamadı: {models_dir}")
+        self.net = cv2.dnn.readNetFromCaffe(str(prototxt), str(weights))
+        self.min_face_size = min_face_size
+        self.score_threshold = score_threshold
+
+    def detect(self, frame):
+        image = Frame.wrap(frame).bgr
+        height, width = image.shape[:2]
+        blob = cv2.dnn.blobFromImage(cv2.resize(image, (300, 300)), 1.0, (300, 300), (104.0, 177.0, 123.0))
+        self.net.setInput(blob)
+        detections = self.net.forward()[0, 0]
+
+        faces = []
+        for detection in detections:
+            confidence = float(detection[2])
+            if confidence < self.score_threshold:
+                continue
+            x1, y1, x2, y2 = (detection[3:7] * np.array([width, height, width, height])).astype(int)
+            x1, y1 = max(0, x1), max(0, y1)
+            w, h = min(width, x2) - x1, min(height, y2) - y1
+            if min(w, h) < self.min_face_size:
+                continue
+            faces.append({"box": [int(x1), int(y1), int(w), int(h)], "confidence": confidence, "keypoints": {}})
+        return faces
+
+class CoarseToFineDetector(FaceDetector):
+    """Önce küçültülmüş karede tespit, sonra kutuları tam çözünürlükte iyileştir"""
+
+    def __init__(self, base: FaceDetector, scale: float = 0.5, refine_margin: float = 0.3):
+        self.base = base
+        self.scale = scale
+        self.refine_margin = refine_margin
+        self.name = f"coarse:{base.name}"
+
+    def detect(self, frame):
+        frame = Frame.wrap(frame)
+        image = frame.image
+        height, width = image.shape[:2]
+        small = Frame(cv2.resize(image, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA),
+                      frame.color_space)
+
+        faces = []
+        for coarse in self.base.detect(small):
+            # Kaba kutuyu tam çözünürlüğe taşı ve çevresini genişlet
+            x, y, w, h = (int(round(v / self.scale)) for v in coarse["box"])
+            margin = int(max(w, h) * self.refine_margin)
+            rx, ry = max(0, x - margin), max(0, y - margin)
+            rw, rh = min(width, x + w + margin) - rx, min(height, y + h + margin) - ry
+
+            # Bölgede tam çözünürlükte yeniden tespit et
+            region = Frame(image[ry:ry+rh, rx:rx+rw], frame.color_space)
+            refined = self.base.detect(region) if rw > 0 and rh > 0 else []
+            if refined:
+                best = max(refined, key=lambda f: f["confidence"])
+                bx, by, bw, bh = best["box"]
+                keypoints = {k: (px + rx, py + ry) for k, (px, py) in best.get("keypoints", {}).items()}
+                faces.append({"box": [bx + rx, by + ry, bw, bh], "confidence": best["confidence"], "keypoints": keypoints})
+            else:
+                faces.append({"box": [x, y, w, h], "confidence": coarse["confidence"], "keypoints": {}})
+        return faces
+
+DETECTORS = {
+    MTCNNDetector.name: MTCNNDetector,
+    HaarCascadeDetector.name: HaarCascadeDetector,
+    OpenCVDNNDetector.name: OpenCVDNNDetector,
+}
+
+def create_detector(backend: str = None, min_face_size: int = 60, coarse_scale: float = 0.5):
+    """İsmi verilen dedektörü oluştur ("coarse:<isim>" kaba-ince modu açar)"""
+    backend = (backend or DEFAULT_DETECTOR).lower()
+    if backend.startswith("coarse:"):
+        # Küçültülmüş karede yüzler de küçülür; minimum boyut buna göre ayarlanır
+        base = create_detector(backend.split(":", 1)[1], max(12, int(min_face_size * coarse_scale)))
+        return CoarseToFineDetector(base, scale=coarse_scale)
+    if backend not in DETECTORS:
+        raise ValueError(f"Bilinmeyen yüz dedektörü: {backend} (seçenekler: {', '.join(DETECTORS)})")
+    logger.info(f"Yüz dedektörü: {backend}")
+    return DETECTORS[backend](min_face_size=min_face_size)
@@ -0,0 +1,199 @@
+import numpy as np
+import logging
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Modül yolunu ayarlama
+sys.path.append(str(Path(__file__).parent.parent))
+from ai_module.face_index import ANN_THRESHOLD, BruteForceIndex, IVFIndex, create_index
+
+logger = logging.getLogger(__name__)
+
+def embedding_to_bytes(embedding) -> bytes:
+    """Vektörü veritabanında saklamak için float32 byte dizisine çevir"""
+    return np.asarray(embedding, dtype=np.float32).tobytes()
+
+def embedding_from_bytes(data: bytes):
+    """Veritabanındaki byte dizisinden float32 vektörü oku"""
+    return np.frombuffer(data, dtype=np.float32)
+
+class FaceGallery:
+    """Kayıtlı kişilerin yüz vektörlerini arama indeksinde tutan galeri
+
+    Aramalar kilitsizdir; değişiklikler (ekleme, silme, yeniden adlandırma) kendi aralarında
+    kilitle sıralanır ve indekse tek atamayla yansır. Etiket araması id ile yapıldığından
+    eşzamanlı bir arama ya doğru kişiyi ya da hiç sonuç döndürür.
+    """
+
+    def __init__(self, dimension: int = 512):
+        self.dimension = dimension
+        self.labels = {}  # Kullanıcı id -> kişi adı
+        self.index = BruteForceIndex(dimension)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.labels)
+
+    @staticmethod
+    def normalize(vectors):
+        """Vektörleri L2 normuna göre birim uzunluğa getir"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def build(self, entries: dict):
+        """{kullanıcı id: (kişi adı, [vektörler])} girdilerinden galeriyi baştan oluştur"""
+        labels = {}
+        ids = []
+        rows = []
+        for user_id, (label, embeddings) in entries.items():
+            if not embeddings:
+                continue
+            # Kişinin tüm referanslarının ortalamasını tek bir vektörde topla
+            labels[user_id] = label
+            ids.append(user_id)
+            rows.append(self.normalize(embeddings).mean(axis=0))
+
+        index = create_index(len(ids), self.dimension)
+        if rows:
+            index.add(ids, self.normalize(np.stack(rows)))
+        with self._lock:
+            self.index = index
+            self.labels = labels
+        logger.info(f"Yüz galerisi oluşturuldu: {len(self.labels)} kişi ({type(self.index).__name__})")
+
+    def load(self, records):
+        """(kullanıcı id, kişi adı, byte dizisi) kayıtlarından galeriyi toplu olarak yükle"""
+        entries = {}
+        expected_size = self.dimension * np.dtype(np.float32).itemsize
+        for user_id, label, data in records:
+            if data is None or len(data) != expected_size:
+                logger.warning(f"Geçersiz yüz vektörü atlandı: {label}")
+                continue
+            entries.setdefault(user_id, (label, []))[1].append(embedding_from_bytes(data))
+
+        self.build(entries)
+        return len(self.labels)
+
+    def add(self, user_id, label, embedding):
+        """Galeriye kişi ekle, kişi zaten varsa vektörünü güncelle"""
+        with self._lock:
+            self.labels[user_id] = label
+            self.index.add([user_id], self.normalize(embedding).reshape(1, self.dimension))
+
+            # Galeri büyüdüğünde yaklaşık aramaya geç (yeni indeks hazır olunca yayınlanır)
+            if isinstance(self.index, BruteForceIndex) and len(self.index) >= ANN_THRESHOLD:
+                ids, vectors = self.index.vectors()
+                index = IVFIndex(self.dimension)
+                index.add(ids, vectors)
+                self.index = index
+
+    def rename(self, user_id, label):
+        """Kişinin adını güncelle (vektörü değişmez)"""
+        with self._lock:
+            if user_id in self.labels and self.labels[user_id] != label:
+                self.labels[user_id] = label
+                return True
+            return False
+
+    def remove(self, user_id):
+        """Kişiyi galeriden sil"""
+        with self._lock:
+            if user_id not in self.labels:
+                return False
+            # Önce indeksten çıkarılır; etiket silinirken arama artık bu kişiyi bulamaz
+            self.index.remove([user_id])
+            del self.labels[user_id]
+            return True
+
+    def match(self, embedding):
+        """En yakın kişiyi ve kosinüs mesafesini döndür"""
+        if not self.labels:
+            return None
+        query = self.normalize(embedding).reshape(self.dimension)
+        ids, distances = self.index.search(query, k=1)
+        if len(ids) == 0:
+            return None
+        label = self.labels.get(int(ids[0]))
+        if label is None:
+            return None  # Eşzamanlı olarak silinen kişi
+        return label, float(distances[0])
+
+    def save_snapshot(self, directory):
+        """Galeriyi işçi süreçlerin bellek eşlemeli okuyabileceği dosyalara yaz"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        version = time.time_ns()
+        # Değişiklikler beklerken tutarlı bir kopya alınır (IVF küme sınırları dahil)
+        with self._lock:
+            index = self.index
+            ids, vectors = index.vectors()
+            labels = dict(self.labels)
+            ivf = isinstance(index, IVFIndex) and index.centroids is not None
+            offsets = np.cumsum([0] + [len(inv) for inv in index.lists]).tolist() if ivf else None
+        np.save(directory / f"ids_{version}.npy", np.asarray(ids, dtype=np.int64))
+        np.save(directory / f"embeddings_{version}.npy", np.ascontiguousarray(vectors, dtype=np.float32))
+
+        # Manifest en son ve atomik olarak yazılır; okuyucular yarım sürüm görmez
+        manifest = {
+            "version": version,
+            "dimension": self.dimension,
+            "labels": {str(user_id): label for user_id, label in labels.items()}
+        }
+        if ivf:
+            # Satırlar küme sırasıyla yazıldığı için her küme dosyada ardışık bir aralıktır;
+            # işçiler k-means'i yeniden eğitmeden kümeleri dosyadan dilimler
+            np.save(directory / f"centroids_{version}.npy", index.centroids)
+            manifest["ivf"] = {"nprobe": index.nprobe, "offsets": offsets}
+        temp_path = directory / f"gallery_{version}.json.tmp"
+        temp_path.write_text(json.dumps(manifest), encoding="utf-8")
+        os.replace(temp_path, directory / "gallery.json")
+
+        # Eski sürümleri temizle (son iki sürüm açık kalabilir)
+        for old_path in sorted(directory.glob("ids_*.npy"))[:-2]:
+            old_version = old_path.stem.split("_")[1]
+            for path in (
+                old_path,
+                directory / f"embeddings_{old_version}.npy",
+                directory / f"centroids_{old_version}.npy"
+            ):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+        return version
+
+    @classmethod
+    def from_snapshot(cls, directory):
+        """Galeriyi diskteki dosyalardan bellek eşlemeli (kopyasız) olarak aç"""
+        directory = Path(directory)
+        manifest = json.loads((directory / "gallery.json").read_text(encoding="utf-8"))
+        version = manifest["version"]
+        gallery = cls(dimension=manifest["dimension"])
+        gallery.labels = {int(user_id): label for user_id, label in manifest["labels"].items()}
+        ids = np.load(directory / f"ids_{version}.npy")
+        vectors = np.load(directory / f"embeddings_{version}.npy", mmap_mode="r")
+
+        # Matris kopyalanmaz; tüm işçiler aynı sayfa önbelleğini paylaşır
+        ivf = manifest.get("ivf")
+        if ivf is None:
+            gallery.index = BruteForceIndex(gallery.dimension)
+            gallery.index.replace(ids, vectors)
+            return gallery
+
+        centroids = np.load(directory / f"centroids_{version}.npy", mmap_mode="r")
+        index = IVFIndex(gallery.dimension, nlist=len(centroids), nprobe=ivf["nprobe"])
+        index.centroids = centroids
+        offsets = ivf["offsets"]
+        for list_id, (start, end) in enumerate(zip(offsets[:-1], offsets[1:])):
+            inv = BruteForceIndex(gallery.dimension)
+            inv.replace(ids[start:end], vectors[start:end])
+            index.lists.append(inv)
+            index.assignments.update(dict.fromkeys(inv.ids.tolist(), list_id))
+        gallery.index = index
+        return gallery
@@ -0,0 +1,170 @@
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bu boyuttan büyük galeriler için yaklaşık arama (IVF) kullanılır
+ANN_THRESHOLD = 5000
+
+class BruteForceIndex:
+    """Tüm vektörlerle birebir karşılaştırma yapan kesin arama indeksi
+
+    id'ler ve matris tek bir (ids, matris) çiftinde tutulur; değişiklikler yeni çifti oluşturup
+    tek atamayla yayınlar. Böylece eşzamanlı bir arama her zaman birbirine uyan id ve satırları görür.
+    """
+
+    def __init__(self, dimension: int = 512):
+        self.dimension = dimension
+        self._data = (np.empty(0, dtype=np.int64), np.empty((0, dimension), dtype=np.float32))
+
+    @property
+    def ids(self):
+        return self._data[0]
+
+    @property
+    def matrix(self):
+        return self._data[1]
+
+    def __len__(self):
+        return len(self._data[0])
+
+    def replace(self, ids, matrix):
+        """İndeksin içeriğini verilen (id, matris) çiftiyle tek seferde değiştir (kopyalamaz)"""
+        self._data = (ids, matrix)
+
+    def add(self, ids, vectors):
+        """Vektörleri ekle, aynı id varsa üzerine yaz"""
+        ids = np.asarray(ids, dtype=np.int64).reshape(-1)
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dimension)
+        current_ids, matrix = self._data
+        keep = ~np.isin(current_ids, ids)
+        self._data = (
+            np.concatenate([current_ids[keep], ids]),
+            np.ascontiguousarray(np.vstack([matrix[keep], vectors]))
+        )
+
+    def remove(self, ids):
+        """Verilen id'lere ait vektörleri sil"""
+        current_ids, matrix = self._data
+        keep = ~np.isin(current_ids, np.asarray(ids, dtype=np.int64).reshape(-1))
+        if not keep.all():
+            self._data = (current_ids[keep], np.ascontiguousarray(matrix[keep]))
+
+    def vectors(self):
+        """İndeksteki tüm (id, vektör) çiftlerini döndür"""
+        return self._data
+
+    def search(self, query, k: int = 1):
+        """Sorguya en yakın k vektörün id'lerini ve kosinüs mesafelerini döndür"""
+        ids, matrix = self._data
+        if len(ids) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        distances = 1.0 - matrix @ np.asarray(query, dtype=np.float32)
+        k = min(k, len(distances))
+        nearest = np.argpartition(distances, k - 1)[:k]
+        nearest = nearest[np.argsort(distances[nearest])]
+        return ids[nearest], distances[nearest]
+
+class IVFIndex:
+    """Vektörleri k-means kümelerine bölen ve sadece en yakın kümelerde arayan indeks"""
+
+    def __init__(self, dimension: int = 512, nlist: int = None, nprobe: int = 8):
+        self.dimension = dimension
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.centroids = None
+        self.lists = []  # Küme -> BruteForceIndex
+        self.assignments = {}  # id -> küme
+
+    def __len__(self):
+        return len(self.assignments)
+
+    def train(self, vectors, iterations: int = 10, seed: int = 0):
+        """Küme merkezlerini mevcut vektörler üzerinde k-means ile öğren"""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dimension)
+        nlist = self.nlist or max(1, int(np.sqrt(len(vectors))))
+        nlist = min(nlist, len(vectors))
+        rng = np.random.default_rng(seed)
+        centroids = vectors[rng.choice(len(vectors), nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignments = np.argmax(vectors @ centroids.T, axis=1)
+            for i in range(nlist):
+                members = vectors[assignments == i]
+                if len(members):
+                    centroid = members.mean(axis=0)
+                    norm = np.linalg.norm(centroid)
+                    centroids[i] = centroid / norm if norm else centroid
+
+        self.nlist = nlist
+        self.centroids = np.ascontiguousarray(centroids)
+        self.lists = [BruteForceIndex(self.dimension) for _ in range(nlist)]
+        self.assignments = {}
+        logger.info(f"IVF indeksi eğitildi: {nlist} küme, {len(vectors)} vektör")
+
+    def add(self, ids, vectors):
+        """Vektörleri en yakın kümeye ekle, aynı id varsa taşı"""
+        ids = np.asarray(ids, dtype=np.int64).reshape(-1)
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dimension)
+        if self.centroids is None:
+            self.train(vectors)
+        self.remove(ids)
+
+        assignments = np.argmax(vectors @ self.centroids.T, axis=1)
+        for list_id in np.unique(assignments):
+            mask = assignments == list_id
+            self.lists[list_id].add(ids[mask], vectors[mask])
+        for vector_id, list_id in zip(ids.tolist(), assignments.tolist()):
+            self.assignments[vector_id] = list_id
+
+    def remove(self, ids):
+        """Verilen id'lere ait vektörleri kümelerinden sil"""
+        for vector_id in np.asarray(ids, dtype=np.int64).reshape(-1).tolist():
+            list_id = self.assignments.pop(vector_id, None)
+            if list_id is not None:
+                self.lists[list_id].remove([vector_id])
+
+    def vectors(self):
+        """İndeksteki tüm (id, vektör) çiftlerini döndür"""
+        if not self.lists:
+            return np.empty(0, dtype=np.int64), np.empty((0, self.dimension), dtype=np.float32)
+        pairs = [inv.vectors() for inv in self.lists]
+        return (
+            np.concatenate([ids for ids, _ in pairs]),
+            np.vstack([matrix for _, matrix in pairs])
+        )
+
+    def search(self, query, k: int = 1):
+        """Sadece en yakın nprobe kümede arama yap"""
+        if not self.assignments:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        query = np.asarray(query, dtype=np.float32)
+        nprobe = min(self.nprobe, self.nlist)
+        probes = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+
+        candidate_ids = []
+        candidate_distances = []
+        for list_id in probes:
+            ids, distances = self.lists[list_id].search(query, k)
+            candidate_ids.append(ids)
+            candidate_distances.append(distances)
+
+        ids = np.concatenate(candidate_ids)
+        distances = np.concatenate(candidate_distances)
+        order = np.argsort(distances)[:k]
+        return ids[order], distances[order]
+
+def create_index(size: int, dimension: int = 512):
+    """Galeri boyutuna göre uygun indeksi oluştur"""
+    if size >= ANN_THRESHOLD:
+        return IVFIndex(dimension)
+    return BruteForceIndex(dimension)
+
+def evaluate_recall(index, exact_index, queries, k: int = 1):
+    """Yaklaşık indeksin kesin aramaya göre recall@k değerini hesapla"""
+    hits = 0
+    for query in queries:
+        expected, _ = exact_index.search(query, k)
+        found, _ = index.search(query, k)
+        hits += len(set(expected.tolist()) & set(found.tolist()))
+    return hits / max(1, len(queries) * k)
@@ -2,11 +2,21 @@ import cv2
 import numpy as np
 from pathlib import Path
 import logging
+import sys
 from tqdm import tqdm
 from deepface import DeepFace
-from mtcnn import MTCNN
 import tensorflow as tf
 
+# Modül yolunu ayarlama
+sys.path.append(str(Path(__file__).parent.parent))
+from ai_module.face_gallery import FaceGallery
+from ai_module.frame import Frame
+from ai_module.inference_scheduler import InferenceScheduler
+from ai_module.video_sampler import frame_step, sample_frames
+from ai_module.face_tracker import FaceTracker
+from ai_module.motion_gate import MotionGate
+from ai_module.face_detectors import create_detector
+
 # GPU bellek kullanımını sınırla
 gpus = tf.config.experimental.list_physical_devices('GPU')
 if gpus:
@@ -32,22 +42,117 @@ FACE_EMBEDDINGS_DIR = DATA_DIR / 'face_embeddings'
 MODELS_DIR = DATA_DIR / 'models'
 
 class FaceRecognitionSystem:
-    def __init__(self):
-        """Yüz tanıma sistemini başlat"""
-        self.detector = MTCNN(min_face_size=60)
+    def __init__(self, face_records=None, gallery=None, detector_backend=None):
+        """Yüz tanıma sistemini başlat
+
+        gallery verilirse hazır galeri kullanılır; face_records verilirse galeri veritabanındaki
+        (kullanıcı id, kişi adı, vektör) kayıtlarından yüklenir, aksi halde referans
+        fotoğraflarından hesaplanır. detector_backend verilmezse FACE_DETECTOR kullanılır.
+        """
+        self.detector = create_detector(detector_backend, min_face_size=60)
         self.model_name = "Facenet512"
         self.distance_metric = "cosine"
         self.threshold = 0.65  # Threshold değerini daha da artırdık
-        
+        self.batch_size = 32  # Tek ileri geçişteki en fazla yüz sayısı
+        self.scheduler = None  # Eşzamanlı istekler için ortak batch zamanlayıcı
+
+        # Modeli bir kez yükle; yeni DeepFace sürümleri Keras modelini sarmalayarak döndürür
+        model = DeepFace.build_model(self.model_name)
+        self.model = getattr(model, "model", model)
+        self.input_size = tuple(self.model.input_shape[1:3])
+
+        if gallery is not None and len(gallery) > 0:
+            self.gallery = gallery
+        else:
+            self.gallery = FaceGallery(dimension=512)
+            if not face_records or self.gallery.load(face_records) == 0:
+                self.build_gallery()
+
+    def _preprocess_face(self, face_image):
+        """Yüzü oranını koruyarak model girdi boyutuna getir ve [0, 1] aralığına ölçekle"""
+        target_h, target_w = self.input_size
+        h, w = face_image.shape[:2]
+        factor = min(target_h / h, target_w / w)
+        resized = cv2.resize(face_image, (max(1, int(w * factor)), max(1, int(h * factor))))
+
+        # Kalan alanı siyah kenarlıkla doldur (DeepFace ile aynı ön işleme)
+        padded = np.zeros((target_h, target_w, 3), dtype=np.float32)
+        top = (target_h - resized.shape[0]) // 2
+        left = (target_w - resized.shape[1]) // 2
+        padded[top:top+resized.shape[0], left:left+resized.shape[1]] = resized
+        return padded / 255.0
+
+    def enable_scheduler(self, max_batch_size=32, max_delay_ms=10):
+        """Vektör hesaplamalarını eşzamanlı istekler arasında ortak batch'lerde çalıştır"""
+        if self.scheduler is None:
+            self.scheduler = InferenceScheduler(
+                self.compute_embeddings,
+                max_batch_size=max_batch_size,
+                max_delay_ms=max_delay_ms
+            )
+        return self.scheduler
+
+    def get_embeddings(self, face_images):
+        """BGR yüz görüntülerinin Facenet512 vektörlerini toplu (batch) olarak hesapla"""
+        if len(face_images) == 0:
+            return np.empty((0, 512), dtype=np.float32)
+
+        # Zamanlayıcı açıksa diğer isteklerin yüzleriyle aynı batch'te hesaplanır
+        if self.scheduler is not None and not self.scheduler.is_worker_thread():
+            return self.scheduler.embed(face_images)
+        return self.compute_embeddings(face_images)
+
+    def compute_embeddings(self, face_images):
+        """Yüz vektörlerini doğrudan modelde hesapla"""
+
+        batch = np.stack([self._preprocess_face(face) for face in face_images])
+        embeddings = []
+        # Tek bir ileri geçişte en fazla batch_size yüz işle
+        for start in range(0, len(batch), self.batch_size):
+            chunk = batch[start:start + self.batch_size]
+            embeddings.append(np.asarray(self.model(chunk, training=False), dtype=np.float32))
+        return np.concatenate(embeddings)
+
+    def get_embedding(self, face_image):
+        """Yüz görüntüsünün (veya dosya yolunun) Facenet512 vektörünü hesapla"""
+        try:
+            if isinstance(face_image, str):
+                face_image = cv2.imread(face_image)
+            return self.get_embeddings([face_image])[0]
+
+        except Exception as e:
+            logger.error(f"Yüz vektörü hesaplama hatası: {e}")
+            return None
+
+    def build_gallery(self):
+        """Referans fotoğraflarından yüz galerisini oluştur"""
+        entries = {}
+        synthetic_ids = {}
+        for img_path in TEST_IMAGES_DIR.glob("*.jpg"):
+            # Dosya adı: <isim>_<kullanıcı id>.jpg
+            parts = img_path.stem.split('_')
+            person_name = parts[0]
+            if len(parts) > 1 and parts[-1].isdigit():
+                user_id = int(parts[-1])
+            else:
+                # Id içermeyen dosyalar için negatif geçici id kullan
+                user_id = synthetic_ids.setdefault(person_name, -(len(synthetic_ids) + 1))
+
+            embedding = self.get_embedding(str(img_path))
+            if embedding is not None:
+                entries.setdefault(user_id, (person_name, []))[1].append(embedding)
+
+        self.gallery.build(entries)
+        return len(self.gallery)
+
     def detect_faces(self, image):
         """Görüntüdeki yüzleri tespit et"""
         try:
-            # BGR'dan RGB'ye dönüştür
-            if len(image.shape) == 3:
-                image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            # Dedektör ihtiyaç duyduğu renk uzayını Frame üzerinden (en fazla bir dönüşümle) alır
+            frame = Frame.wrap(image)
             
             # Yüzleri tespit et
-            faces = self.detector.detect_faces(image)
+            faces = self.detector.detect(frame)
             
             # Yüzleri güven skoruna göre sırala
             faces = sorted(faces, key=lambda x: x['confidence'], reverse=True)
@@ -78,90 +183,108 @@ class FaceRecognitionSystem:
             logger.error(f"Yüz doğrulama hatası: {e}")
             return None
     
+    def match_embedding(self, embedding):
+        """Yüz vektörünü galeri ile eşleştir, threshold altındaysa None döndür"""
+        match = self.gallery.match(embedding)
+        if match is None:
+            return None
+        person_name, score = match
+
+        # Threshold kontrolü
+        if score > self.threshold:
+            logger.info(f"Eşleşme bulundu ama threshold altında: {person_name} ({1-score:.2f})")
+            return None
+
+        return person_name, 1 - score  # Skoru 0-1 aralığına normalize et
+
     def find_best_match(self, face_image):
         """Verilen yüz görüntüsü için en iyi eşleşmeyi bul"""
         try:
-            matches = []
-            
-            # Her referans fotoğrafı ile karşılaştır
-            for img_path in TEST_IMAGES_DIR.glob("*.jpg"):
-                person_name = img_path.stem.split('_')[0]
-                
-                try:
-                    result = self.verify_face(face_image, str(img_path))
-                    if result:
-                        matches.append((person_name, result["distance"]))
-                except:
-                    continue
-            
-            if not matches:
-                return None
-                
-            # En iyi eşleşmeyi bul
-            best_match = min(matches, key=lambda x: x[1])
-            person_name, score = best_match
-            
-            # Threshold kontrolü
-            if score > self.threshold:
-                logger.info(f"Eşleşme bulundu ama threshold altında: {person_name} ({1-score:.2f})")
+            # Yüz başına tek bir vektör hesapla
+            embedding = self.get_embedding(face_image)
+            if embedding is None:
                 return None
-                
-            return person_name, 1 - score  # Skoru 0-1 aralığına normalize et
+
+            # Tüm galeri ile tek seferde karşılaştır
+            return self.match_embedding(embedding)
             
         except Exception as e:
             logger.error(f"Eşleşme hatası: {e}")
             return None
+
+    def extract_faces(self, image, min_confidence=0.85, margin_ratio=0.1):
+        """Yüzleri tespit et ve kırp (tespit + hizalama/kırpma adımları)
+
+        Kırpılan yüzler DeepFace'in beklediği BGR renk uzayında, kopyasız view olarak döner.
+        """
+        frame = Frame.wrap(image)
+        extracted = []
+        for face in self.detect_faces(frame):
+            if face['confidence'] < min_confidence:
+                continue
+
+            # Sınırları kontrol et ve margin ekle
+            x, y, w, h = face['box']
+            margin = int(min(w, h) * margin_ratio)
+            x = max(0, x - margin)
+            y = max(0, y - margin)
+            w = min(w + 2*margin, frame.shape[1] - x)
+            h = min(h + 2*margin, frame.shape[0] - y)
+            if w <= 0 or h <= 0:
+                continue
+
+            extracted.append({
+                "box": (x, y, w, h),
+                "confidence": face['confidence'],
+                "face": frame.crop((x, y, w, h))
+            })
+
+        return extracted
+
+    def recognize_faces(self, image, min_confidence=0.85, margin_ratio=0.1):
+        """Tespit → kırpma → vektör → eşleştirme; her yüz için her adım bir kez çalışır"""
+        faces = self.extract_faces(image, min_confidence, margin_ratio)
+        recognized_people = []
+        for face, result in zip(faces, self.match_faces(faces)):
+            if result:
+                person_name, confidence = result
+                recognized_people.append({
+                    "name": person_name,
+                    "confidence": confidence,
+                    "box": face["box"]
+                })
+
+        return recognized_people
+
+    def match_faces(self, faces):
+        """Kırpılmış yüzleri tek batch'te vektöre çevirip eşleştir; her yüz için sonuç ya da None"""
+        if not faces:
+            return []
+
+        try:
+            # Karedeki tüm yüzleri tek bir batch olarak vektöre çevir
+            embeddings = self.get_embeddings([face["face"] for face in faces])
+        except Exception as e:
+            logger.error(f"Yüz vektörü hesaplama hatası: {e}")
+            return [None] * len(faces)
+
+        return [self.match_embedding(embedding) for embedding in embeddings]
     
     def process_image(self, image):
-        """Görüntüdeki yüzleri tanı"""
+        """Görüntüdeki yüzleri tanı (numpy girdisi BGR kabul edilir)"""
         try:
-            # BGR'dan RGB'ye dönüştür
-            image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            
-            # Yüzleri tespit et
-            faces = self.detect_faces(image_rgb)
-            if not faces:
-                return []
-            
-            recognized_people = []
-            
-            # Her yüz için
-            for face in faces:
-                if face['confidence'] < 0.85:  # Güven skorunu biraz daha düşürdük
-                    continue
-                    
-                try:
-                    # Yüz bölgesini kes
-                    x, y, w, h = face['box']
-                    # Sınırları kontrol et ve biraz genişlet
-                    margin = int(min(w, h) * 0.1)  # %10 margin
-                    x = max(0, x - margin)
-                    y = max(0, y - margin)
-                    w = min(w + 2*margin, image_rgb.shape[1] - x)
-                    h = min(h + 2*margin, image_rgb.shape[0] - y)
-                    
-                    face_image = image_rgb[y:y+h, x:x+w]
-                    
-                    # En iyi eşleşmeyi bul
-                    result = self.find_best_match(face_image)
-                    if result:
-                        person_name, confidence = result
-                        recognized_people.append({
-                            "name": person_name,
-                            "confidence": confidence
-                        })
-                except Exception as e:
-                    logger.error(f"Yüz işleme hatası: {str(e)}")
-                    continue
-            
-            return recognized_people
+            return self.recognize_faces(Frame.wrap(image), min_confidence=0.85, margin_ratio=0.1)
             
         except Exception as e:
             logger.error(f"Görüntü işleme hatası: {e}")
             return []
     
-    def process_video(self, video_path):
-        """Video üzerinde yüz tanıma işlemi gerçekleştir"""
+    def process_video(self, video_path, every_n_frames=2, frames_per_second=None, motion_threshold=2.0):
+        """Video üzerinde yüz tanıma işlemi gerçekleştir
+
+        motion_threshold: son işlenen kareye göre ortalama gri ton farkı bunun altındaysa
+        tespit atlanır ve önceki tespitler kullanılır (None/0: kapalı).
+        """
         try:
             video_name = Path(video_path).name
             logger.info(f"Video işleniyor: {video_name}")
@@ -172,79 +295,56 @@ class FaceRecognitionSystem:
                 logger.error("Video açılamadı")
                 return False
             
-            frame_count = 0
-            recognized_persons = {}  # Kişi -> [en yüksek güven skoru, tespit sayısı]
+            tracker = FaceTracker()
+            motion_gate = MotionGate(threshold=motion_threshold)
+            faces = []
             total_frames_processed = 0
+            recognition_calls = 0
             
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                
-                frame_count += 1
-                
-                # Her 2 frame'de bir işle
-                if frame_count % 2 != 0:
-                    continue
-                    
+            # Varsayılan olarak her 2 frame'de bir işle; atlanan kareler read() ile okunmaz
+            step = frame_step(cap, every_n=every_n_frames, frames_per_second=frames_per_second)
+            for frame_index, frame in sample_frames(cap, step=step):
+                frame_count = frame_index + 1
                 total_frames_processed += 1
                 
                 # Frame'i yeniden boyutlandır
-                height, width = frame.shape[:2]
-                max_dimension = 800
-                if max(height, width) > max_dimension:
-                    scale = max_dimension / max(height, width)
-                    frame = cv2.resize(frame, None, fx=scale, fy=scale)
+                frame = Frame(frame, "BGR").resized(max_dimension=800)
                 
-                # BGR'dan RGB'ye dönüştür
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                # Sahne değiştiyse yüzleri tespit et, değişmediyse önceki tespitleri kullan
+                # Confidence kontrolü - daha esnek, %20 margin
+                if motion_gate.should_process(frame):
+                    faces = self.extract_faces(frame, min_confidence=0.80, margin_ratio=0.2)
+                tracked = tracker.update([face["box"] for face in faces])
                 
-                # Yüzleri tespit et
-                faces = self.detect_faces(frame_rgb)
+                # Sadece yeni, doğrulama zamanı gelmiş veya izi belirsizleşmiş yüzleri tanı
+                pending = [(face, track) for face, (track, needed) in zip(faces, tracked) if needed]
+                results = self.match_faces([face for face, _ in pending])
+                recognition_calls += len(pending)
                 
-                # Her yüz için
-                for face in faces:
-                    # Confidence kontrolü - daha esnek
-                    if face['confidence'] < 0.80:  # Yüz tespiti için eşiği düşürdük
-                        continue
-                        
-                    try:
-                        # Yüz bölgesini kes
-                        x, y, w, h = face['box']
-                        # Sınırları kontrol et ve margin ekle
-                        margin = int(min(w, h) * 0.2)  # %20 margin
-                        x = max(0, x - margin)
-                        y = max(0, y - margin)
-                        w = min(w + 2*margin, frame_rgb.shape[1] - x)
-                        h = min(h + 2*margin, frame_rgb.shape[0] - y)
-                        
-                        face_image = frame_rgb[y:y+h, x:x+w]
-                        
-                        # Yüz görüntüsünü yeniden boyutlandır
-                        face_image = cv2.resize(face_image, (224, 224))
-                        
-                        # Yüzü tanı
-                        result = self.process_image(face_image)
-                        if result:
-                            for person in result:
-                                name = person["name"]
-                                confidence = person["confidence"]
-                                
-                                if name not in recognized_persons:
-                                    recognized_persons[name] = [confidence, 1]
-                                else:
-                                    # En yüksek güven skorunu ve tespit sayısını güncelle
-                                    old_score, count = recognized_persons[name]
-                                    new_score = max(old_score, confidence)  # En yüksek skoru tut
-                                    recognized_persons[name] = [new_score, count + 1]
-                                    
-                                logger.info(f"Frame {frame_count}: {name} tespit edildi (Güven: {confidence:.2f})")
-                    except Exception as e:
-                        logger.error(f"Yüz işleme hatası: {e}")
-                        continue
+                for (face, track), result in zip(pending, results):
+                    if result:
+                        name, confidence = result
+                        track.record(name, confidence)
+                        logger.info(f"Frame {frame_count}: {name} tespit edildi (iz {track.id}, Güven: {confidence:.2f})")
+                    else:
+                        track.record(None, 0.0)
             
             cap.release()
             
+            # İz bazlı oyları kişi bazında topla: Kişi -> [en yüksek güven skoru, tespit sayısı]
+            recognized_persons = {}
+            for track in tracker.all_tracks():
+                name = track.name
+                if name is None:
+                    continue
+                if name not in recognized_persons:
+                    recognized_persons[name] = [track.confidence, track.hits]
+                else:
+                    old_score, count = recognized_persons[name]
+                    recognized_persons[name] = [max(old_score, track.confidence), count + track.hits]
+            
+            logger.info(f"Tanıma çağrısı: {recognition_calls}, iz sayısı: {len(tracker.all_tracks())}")
+            
             # Sonuçları filtrele
             filtered_persons = {}
             min_detections = max(2, total_frames_processed * 0.05)  # En az 2 kez veya %5'inde tespit edilmeli
@@ -260,6 +360,7 @@ class FaceRecognitionSystem:
             logger.info(f"\n{'='*50}")
             logger.info(f"Video Analiz Sonucu: {video_name}")
             logger.info(f"İşlenen frame sayısı: {total_frames_processed}")
+            logger.info(f"Hareketsiz olduğu için tespiti atlanan frame sayısı: {motion_gate.skipped}")
             
             for person, score in sorted_persons:
                 count = recognized_persons[person][1]
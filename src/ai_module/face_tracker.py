@@ -0,0 +1,124 @@
+import itertools
+
+def iou(box_a, box_b) -> float:
+    """İki (x, y, w, h) kutusunun kesişim/birleşim oranı"""
+    ax, ay, aw, ah = box_a
+    bx, by, bw, bh = box_b
+    inter_w = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    inter_h = max(0, min(ay + ah, by + bh) - max(ay, by))
+    intersection = inter_w * inter_h
+    union = aw * ah + bw * bh - intersection
+    return intersection / union if union > 0 else 0.0
+
+class Track:
+    """Kareler boyunca aynı yüze ait kutuları izleyen iz"""
+
+    def __init__(self, track_id: int, box):
+        self.id = track_id
+        self.box = box
+        self.hits = 1  # İzin görüldüğü kare sayısı
+        self.misses = 0  # Art arda kaçırılan kare sayısı
+        self.last_iou = 1.0  # Son eşleştirmenin güveni
+        self.frames_since_verified = 0
+        self.attempts = 0  # Tanıma denemesi sayısı
+        self.votes = {}  # Kişi -> [en yüksek güven skoru, oy sayısı]
+
+    @property
+    def name(self):
+        """En çok oy alan kişi, henüz tanınmadıysa None"""
+        if not self.votes:
+            return None
+        return max(self.votes.items(), key=lambda item: (item[1][1], item[1][0]))[0]
+
+    @property
+    def confidence(self):
+        name = self.name
+        return self.votes[name][0] if name else 0.0
+
+    def record(self, name, confidence):
+        """Tanıma sonucunu ize oy olarak ekle"""
+        self.frames_since_verified = 0
+        self.attempts += 1
+        if name is None:
+            return
+        if name not in self.votes:
+            self.votes[name] = [confidence, 1]
+        else:
+            best, count = self.votes[name]
+            self.votes[name] = [max(best, confidence), count + 1]
+
+class FaceTracker:
+    """Kutu örtüşmesine (IoU) göre kareler arası yüz izleyici
+
+    Her iz bir kez tanınır; sonra yalnızca reverify_interval karede bir ya da
+    eşleştirme güveni (IoU) min_track_iou'nun altına düştüğünde yeniden doğrulanır.
+    """
+
+    def __init__(self, iou_threshold: float = 0.3, max_misses: int = 5,
+                 reverify_interval: int = 15, retry_interval: int = 3, min_track_iou: float = 0.5):
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.reverify_interval = reverify_interval
+        self.retry_interval = retry_interval
+        self.min_track_iou = min_track_iou
+        self.tracks = []
+        self.finished = []  # Kaybolan izler (sonuç toplamak için)
+        self._ids = itertools.count(1)
+
+    def update(self, boxes):
+        """Yeni karedeki kutuları izlerle eşleştir; her kutu için (iz, tanıma gerekli mi) döndür"""
+        # Tüm çiftleri IoU'ya göre sırala ve açgözlü eşleştir
+        pairs = sorted(
+            ((iou(track.box, box), t, b) for t, track in enumerate(self.tracks) for b, box in enumerate(boxes)),
+            reverse=True
+        )
+        assigned_tracks = {}
+        assigned_boxes = {}
+        for overlap, t, b in pairs:
+            if overlap < self.iou_threshold:
+                break
+            if t in assigned_tracks or b in assigned_boxes:
+                continue
+            assigned_tracks[t] = b
+            assigned_boxes[b] = (t, overlap)
+
+        results = []
+        for b, box in enumerate(boxes):
+            if b in assigned_boxes:
+                t, overlap = assigned_boxes[b]
+                track = self.tracks[t]
+                track.box = box
+                track.hits += 1
+                track.misses = 0
+                track.last_iou = overlap
+                track.frames_since_verified += 1
+            else:
+                track = Track(next(self._ids), box)
+                self.tracks.append(track)
+            results.append((track, self.needs_recognition(track)))
+
+        # Eşleşmeyen izleri yaşlandır, uzun süre görünmeyenleri kapat
+        matched = {track.id for track, _ in results}
+        active = []
+        for track in self.tracks:
+            if track.id not in matched:
+                track.misses += 1
+            if track.misses > self.max_misses:
+                self.finished.append(track)
+            else:
+                active.append(track)
+        self.tracks = active
+
+        return results
+
+    def needs_recognition(self, track) -> bool:
+        """İzin (yeniden) tanınması gerekiyor mu"""
+        if track.attempts == 0 or track.last_iou < self.min_track_iou:
+            return True
+        # Tanınamayan izler daha sık, tanınanlar seyrek olarak yeniden denenir
+        interval = self.reverify_interval if track.name else self.retry_interval
+        return track.frames_since_verified >= interval
+
+    def all_tracks(self):
+        """Aktif ve kapanmış tüm izler"""
+        return self.finished + self.tracks
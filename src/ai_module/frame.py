@@ -0,0 +1,72 @@
+import cv2
+import numpy as np
+
+# Renk uzayı dönüşüm kodları
+_CONVERSIONS = {
+    ("BGR", "RGB"): cv2.COLOR_BGR2RGB,
+    ("RGB", "BGR"): cv2.COLOR_RGB2BGR,
+    ("GRAY", "RGB"): cv2.COLOR_GRAY2RGB,
+    ("GRAY", "BGR"): cv2.COLOR_GRAY2BGR,
+    ("BGR", "GRAY"): cv2.COLOR_BGR2GRAY,
+    ("RGB", "GRAY"): cv2.COLOR_RGB2GRAY,
+}
+
+class Frame:
+    """Renk uzayını bilen görüntü; her dönüşüm tembel yapılır ve en fazla bir kez hesaplanır
+
+    OpenCV (imdecode, VideoCapture) BGR, MTCNN RGB, DeepFace ise numpy girdilerini BGR kabul eder.
+    """
+
+    def __init__(self, image: np.ndarray, color_space: str = "BGR"):
+        if image.ndim == 2:
+            color_space = "GRAY"
+        self.color_space = color_space
+        self._images = {color_space: image}
+
+    @classmethod
+    def wrap(cls, image, color_space: str = "BGR"):
+        """Görüntü zaten Frame ise olduğu gibi döndür, değilse sarmala"""
+        if isinstance(image, Frame):
+            return image
+        return cls(image, color_space)
+
+    @property
+    def image(self) -> np.ndarray:
+        """Görüntünün orijinal renk uzayındaki hali"""
+        return self._images[self.color_space]
+
+    @property
+    def shape(self):
+        return self.image.shape
+
+    def to(self, color_space: str) -> np.ndarray:
+        """Görüntüyü istenen renk uzayında döndür, dönüşümü önbellekte tut"""
+        if color_space not in self._images:
+            code = _CONVERSIONS[(self.color_space, color_space)]
+            self._images[color_space] = cv2.cvtColor(self.image, code)
+        return self._images[color_space]
+
+    @property
+    def bgr(self) -> np.ndarray:
+        return self.to("BGR")
+
+    @property
+    def rgb(self) -> np.ndarray:
+        return self.to("RGB")
+
+    @property
+    def gray(self) -> np.ndarray:
+        return self.to("GRAY")
+
+    def crop(self, box, color_space: str = "BGR") -> np.ndarray:
+        """Kutudaki bölgeyi kopyalamadan (view olarak) döndür"""
+        x, y, w, h = box
+        return self.to(color_space)[y:y+h, x:x+w]
+
+    def resized(self, max_dimension: int):
+        """En uzun kenarı max_dimension'ı aşıyorsa küçültülmüş yeni Frame döndür"""
+        height, width = self.shape[:2]
+        if max(height, width) <= max_dimension:
+            return self
+        scale = max_dimension / max(height, width)
+        return Frame(cv2.resize(self.image, None, fx=scale, fy=scale), self.color_space)
@@ -0,0 +1,97 @@
+import threading
+import queue
+import time
+import logging
+from concurrent.futures import Future
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class InferenceScheduler:
+    """Eşzamanlı isteklerden gelen yüzleri kuyrukta toplayıp tek batch halinde modele veren zamanlayıcı
+
+    Kuyruk, batch boyutu max_batch_size'a ulaştığında ya da ilk isteğin üzerinden
+    max_delay_ms geçtiğinde boşaltılır; her isteğin Future'ı kendi sonuçlarıyla tamamlanır.
+    """
+
+    def __init__(self, embed_fn, max_batch_size: int = 32, max_delay_ms: float = 10):
+        self.embed_fn = embed_fn
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay_ms / 1000.0
+        self._queue = queue.Queue()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="inference-scheduler", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self) -> int:
+        """Kuyrukta bekleyen istek sayısı"""
+        return self._queue.qsize()
+
+    def is_worker_thread(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    def submit(self, face_images) -> Future:
+        """Yüzleri kuyruğa ekle; Future, bu yüzlerin vektör matrisiyle tamamlanır"""
+        future = Future()
+        if len(face_images) == 0:
+            future.set_result(np.empty((0, 0), dtype=np.float32))
+            return future
+        self._queue.put((list(face_images), future))
+        return future
+
+    def embed(self, face_images):
+        """Yüzleri kuyruğa ekle ve sonuçları bekle"""
+        return self.submit(face_images).result()
+
+    def stop(self):
+        """Zamanlayıcıyı durdur"""
+        self._running = False
+        self._queue.put(None)
+        self._thread.join(timeout=1)
+
+    def _collect(self):
+        """Boyut veya süre sınırına kadar kuyruktaki istekleri topla"""
+        first = self._queue.get()
+        if first is None:
+            return []
+        requests = [first]
+        total = len(first[0])
+        deadline = time.monotonic() + self.max_delay
+
+        while total < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._running = False
+                break
+            requests.append(item)
+            total += len(item[0])
+
+        return requests
+
+    def _run(self):
+        while self._running:
+            requests = self._collect()
+            if not requests:
+                continue
+
+            faces = [face for face_images, _ in requests for face in face_images]
+            try:
+                embeddings = self.embed_fn(faces)
+            except Exception as e:
+                logger.error(f"Toplu çıkarım hatası: {e}")
+                for _, future in requests:
+                    future.set_exception(e)
+                continue
+
+            # Sonuçları isteklere geri dağıt
+            offset = 0
+            for face_images, future in requests:
+                future.set_result(embeddings[offset:offset + len(face_images)])
+                offset += len(face_images)
@@ -0,0 +1,52 @@
+import cv2
+import numpy as np
+import sys
+from pathlib import Path
+
+# Modül yolunu ayarlama
+sys.path.append(str(Path(__file__).parent.parent))
+from ai_module.frame import Frame
+
+class MotionGate:
+    """Küçültülmüş kareler arası farka bakarak değişmeyen karelerde tespiti atlayan ön aşama
+
+    Kare, son işlenen kareyle karşılaştırılır; ortalama mutlak gri ton farkı threshold'un
+    altındaysa sahne değişmemiş sayılır ve önceki tespitler yeniden kullanılır.
+    threshold None veya 0 ise her kare işlenir.
+    """
+
+    def __init__(self, threshold: float = 2.0, width: int = 64):
+        self.threshold = threshold
+        self.width = width
+        self.reference = None
+        self.processed = 0
+        self.skipped = 0
+
+    def _signature(self, frame) -> np.ndarray:
+        """Karenin küçük gri ton özetini çıkar"""
+        image = Frame.wrap(frame).image
+        height = max(1, round(image.shape[0] * self.width / image.shape[1]))
+        small = cv2.resize(image, (self.width, height), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small.astype(np.int16)
+
+    def should_process(self, frame) -> bool:
+        """Kare son işlenen kareden yeterince farklıysa True döndür"""
+        if not self.threshold:
+            self.processed += 1
+            return True
+
+        signature = self._signature(frame)
+        if self.reference is not None and self.reference.shape == signature.shape:
+            difference = float(np.mean(np.abs(signature - self.reference)))
+            if difference < self.threshold:
+                self.skipped += 1
+                return False
+
+        self.reference = signature
+        self.processed += 1
+        return True
+
+    def stats(self) -> dict:
+        return {"processed_frames": self.processed, "skipped_frames": self.skipped}
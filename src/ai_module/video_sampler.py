@@ -0,0 +1,42 @@
+import cv2
+
+# Bu adımdan büyük atlamalarda kare kare grab() yerine doğrudan konuma atlanır
+SEEK_THRESHOLD = 15
+
+def frame_step(cap, every_n: int = 1, frames_per_second: float = None) -> int:
+    """Saniyedeki kare hedefinden veya sabit aralıktan örnekleme adımını hesapla"""
+    if frames_per_second:
+        video_fps = cap.get(cv2.CAP_PROP_FPS) or 0
+        if video_fps > 0:
+            return max(1, round(video_fps / frames_per_second))
+    return max(1, int(every_n))
+
+def sample_frames(cap, step: int = 1, max_frames: int = None, seek_threshold: int = SEEK_THRESHOLD):
+    """Videodan her step'inci kareyi (video kare no, kare) olarak üret
+
+    Atlanan kareler read() ile çözülüp kopyalanmaz: kısa atlamalarda sadece grab()
+    çağrılır (renk dönüşümü ve kopya yapılmaz), uzun atlamalarda konuma seek edilir.
+    Böylece maliyet video uzunluğuyla değil örneklenen kare sayısıyla büyür.
+    """
+    position = 0  # Bir sonraki okunacak karenin numarası
+    target = step - 1  # İlk örneklenecek kare
+    sampled = 0
+
+    while max_frames is None or sampled < max_frames:
+        if step >= seek_threshold and target - position > 1:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+            position = target
+
+        while position < target:
+            if not cap.grab():
+                return
+            position += 1
+
+        ret, frame = cap.read()
+        if not ret:
+            return
+        position += 1
+
+        yield target, frame
+        sampled += 1
+        target += step
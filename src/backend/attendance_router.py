@@ -1,7 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
-from datetime import datetime, timezone
+from typing import List, Optional
+from datetime import datetime
+import csv
+import io
+import itertools
+import json
 import sys
 import os
 from pathlib import Path
@@ -9,7 +14,9 @@ from pathlib import Path
 # Modül yolunu ayarlama
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database import crud, schemas
-from database.config import get_db
+from database.config import get_db, SessionLocal
+from database.attendance_cache import attendance_day
+from backend.pagination import NEXT_CURSOR_HEADER, check_page_size, decode_cursor, encode_cursor
 
 router = APIRouter(
     prefix="/attendances",
@@ -17,109 +24,206 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-def format_attendance(attendance, user):
-    """Yoklama kaydını formatla"""
-    return {
-        "id": attendance.id,
-        "user_id": attendance.user_id,
-        "user": {
-            "id": user.id,
-            "name": user.name,
-            "surname": user.surname,
-            "email": user.email,
-            "role": user.role
-        },
-        "check_in_time": attendance.check_in_time.isoformat(),
-        "check_out_time": attendance.check_out_time.isoformat() if attendance.check_out_time else None,
-        "confidence_score": attendance.confidence_score,
-        "status": attendance.status
-    }
-
-@router.get("/today")
+@router.get("/today", response_model=List[schemas.AttendanceWithUser])
 def get_today_attendances(db: Session = Depends(get_db)):
-    """Bugünün yoklama kayıtlarını getir"""
+    """Bugünün yoklama kayıtlarını getir (en yeni en üstte)"""
     try:
-        today = datetime.now(timezone.utc)
-        
-        # Günlük yoklamaları getir
-        daily_attendances = crud.get_daily_attendances(db, today)
-        
-        # Yoklama kayıtlarını formatla
-        formatted_attendances = []
-        for attendance in daily_attendances:
-            user = crud.get_user(db, attendance.user_id)
-            if user:
-                formatted_attendances.append(format_attendance(attendance, user))
-        
-        # Tarihe göre sırala (en yeni en üstte)
-        formatted_attendances.sort(key=lambda x: x["check_in_time"], reverse=True)
-        
-        return formatted_attendances
+        # Kullanıcılar aynı sorguda yüklenir, sıralama veritabanında yapılır
+        return crud.get_daily_attendances(db, attendance_day(), with_user=True)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/daily/{date}")
+@router.get("/daily/{date}", response_model=List[schemas.AttendanceWithUser])
 def get_daily_attendances(date: str, db: Session = Depends(get_db)):
-    """Belirli bir güne ait yoklama kayıtlarını getir"""
+    """Belirli bir güne ait yoklama kayıtlarını getir (en yeni en üstte)"""
     try:
-        # Tarih string'ini datetime objesine çevir
+        # Tarih string'ini güne çevir (gün ATTENDANCE_TIMEZONE'a göredir)
         try:
-            attendance_date = datetime.strptime(date, "%Y-%m-%d")
-            # UTC timezone ekle
-            attendance_date = attendance_date.replace(tzinfo=timezone.utc)
+            attendance_date = datetime.strptime(date, "%Y-%m-%d").date()
         except ValueError:
             raise HTTPException(
                 status_code=400, 
                 detail="Geçersiz tarih formatı. Tarih YYYY-MM-DD formatında olmalıdır."
             )
         
-        # Günlük yoklamaları getir
-        daily_attendances = crud.get_daily_attendances(db, attendance_date)
-        
-        # Yoklama kayıtlarını formatla
-        formatted_attendances = []
-        for attendance in daily_attendances:
-            user = crud.get_user(db, attendance.user_id)
-            if user:
-                formatted_attendances.append(format_attendance(attendance, user))
-        
-        # Tarihe göre sırala (en yeni en üstte)
-        formatted_attendances.sort(key=lambda x: x["check_in_time"], reverse=True)
-        
-        return formatted_attendances
+        return crud.get_daily_attendances(db, attendance_date, with_user=True)
         
     except HTTPException as e:
         raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/user/{user_id}")
+def parse_date(value: str, field: str):
+    """YYYY-MM-DD biçimindeki tarihi güne çevir"""
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Geçersiz {field}. Tarih YYYY-MM-DD formatında olmalıdır."
+        )
+
+@router.get("/user/{user_id}", response_model=List[schemas.AttendanceWithUser])
 def get_user_attendances(
     user_id: int, 
+    response: Response,
     start_date: str = None, 
     end_date: str = None, 
+    limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Belirli bir kullanıcının yoklama kayıtlarını getir"""
+    """Belirli bir kullanıcının yoklama kayıtlarını getir (en yeni en üstte)
+
+    Sonuçlar sayfalanır; sonraki sayfa için X-Next-Cursor başlığındaki değer cursor olarak gönderilir.
+    """
     try:
+        check_page_size(limit)
+        start = parse_date(start_date, "start_date") if start_date else None
+        end = parse_date(end_date, "end_date") if end_date else None
+        before = decode_cursor(cursor) if cursor else None
+
         # Kullanıcıyı kontrol et
         user = crud.get_user(db, user_id)
         if not user:
             raise HTTPException(status_code=404, detail="Kullanıcı bulunamadı")
             
-        # Yoklama kayıtlarını getir
-        attendances = crud.get_user_attendances(db, user_id)
-        
-        # Yoklama kayıtlarını formatla
-        formatted_attendances = [format_attendance(attendance, user) for attendance in attendances]
+        # Tarih aralığı, sıralama ve sayfalama veritabanında yapılır
+        attendances = crud.get_user_attendances(
+            db, user_id, limit=limit, start_date=start, end_date=end, before=before, with_user=True
+        )
+        if len(attendances) == limit:
+            last = attendances[-1]
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.check_in_time, last.id)
         
-        # Tarihe göre sırala (en yeni en üstte)
-        formatted_attendances.sort(key=lambda x: x["check_in_time"], reverse=True)
-        
-        return formatted_attendances
+        return attendances
         
     except HTTPException as e:
         raise e
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+def parse_range(start_date: str, end_date: str):
+    """Özet sorguları için tarih aralığını doğrula"""
+    start = parse_date(start_date, "start_date")
+    end = parse_date(end_date, "end_date")
+    if end < start:
+        raise HTTPException(status_code=400, detail="end_date, start_date'ten önce olamaz")
+    return start, end
+
+@router.get("/summary/daily", response_model=List[schemas.AttendanceDailySummary])
+def get_daily_summaries(
+    start_date: str,
+    end_date: str,
+    user_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """Kullanıcı başına günlük yoklama özetleri (özet tablosundan)"""
+    start, end = parse_range(start_date, end_date)
+    return crud.get_daily_summaries(db, start, end, user_id=user_id)
+
+@router.get("/summary/weekly", response_model=List[schemas.AttendanceWeeklySummary])
+def get_weekly_summaries(
+    start_date: str,
+    end_date: str,
+    user_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """Kullanıcı başına haftalık yoklama özetleri (aralığa değen haftalar dahil)"""
+    start, end = parse_range(start_date, end_date)
+    return crud.get_weekly_summaries(db, start, end, user_id=user_id)
+
+@router.get("/summary/rates", response_model=List[schemas.AttendanceRate])
+def get_attendance_rates(start_date: str, end_date: str, db: Session = Depends(get_db)):
+    """Dönem boyunca öğrenci başına katılım oranı (geç gelenler katılmış sayılır)
+
+    Aralık tam haftalara genişletilir; ders günü, en az bir yoklama alınmış gündür.
+    """
+    start, end = parse_range(start_date, end_date)
+    class_days, rows = crud.get_attendance_rates(db, start, end)
+    return [
+        schemas.AttendanceRate(
+            user_id=user_id,
+            name=name,
+            surname=surname,
+            present_days=present_days or 0,
+            late_days=late_days or 0,
+            absent_days=absent_days or 0,
+            class_days=class_days,
+            attendance_rate=((present_days or 0) + (late_days or 0)) / class_days if class_days else 0.0
+        )
+        for user_id, name, surname, present_days, late_days, absent_days in rows
+    ]
+
+EXPORT_COLUMNS = [
+    "id", "user_id", "name", "surname", "email",
+    "check_in_time", "check_out_time", "confidence_score", "status"
+]
+# Sunucu taraflı imleçten tek seferde okunan satır sayısı
+EXPORT_BATCH_SIZE = 1000
+
+def _export_rows(start, end, user_id):
+    """Yoklamaları kendi oturumunda, sunucu taraflı imleçle parça parça oku
+
+    İstek oturumu (get_db) yanıt akarken kapanacağı için akış kendi oturumunu açar.
+    """
+    db = SessionLocal()
+    try:
+        for partition in crud.stream_attendances(db, start, end, user_id, batch_size=EXPORT_BATCH_SIZE):
+            yield partition
+    finally:
+        db.close()
+
+def _format_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def _csv_stream(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # Başlık sorgu beklenmeden gönderilir (ilk bayt hemen ulaşır)
+    writer.writerow(EXPORT_COLUMNS)
+    for partition in itertools.chain([()], rows):
+        for row in partition:
+            writer.writerow([_format_value(value) for value in row])
+        # Her parçayı ayrı bir yığın olarak gönder; bellek parça boyutuyla sınırlı kalır
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+def _ndjson_stream(rows):
+    for partition in rows:
+        yield "".join(
+            json.dumps(dict(zip(EXPORT_COLUMNS, map(_format_value, row))), ensure_ascii=False) + "\n"
+            for row in partition
+        )
+
+@router.get("/export")
+def export_attendances(
+    format: str = "csv",
+    start_date: str = None,
+    end_date: str = None,
+    user_id: Optional[int] = None
+):
+    """Yoklamaları CSV veya NDJSON olarak akış halinde dışa aktar
+
+    Satırlar veritabanından parça parça okunup hemen gönderilir; bellek kullanımı
+    satır sayısından bağımsızdır.
+    """
+    if format not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="format csv veya ndjson olmalı")
+    start = parse_date(start_date, "start_date") if start_date else None
+    end = parse_date(end_date, "end_date") if end_date else None
+
+    rows = _export_rows(start, end, user_id)
+    if format == "csv":
+        media_type, content = "text/csv; charset=utf-8", _csv_stream(rows)
+    else:
+        media_type, content = "application/x-ndjson", _ndjson_stream(rows)
+
+    filename = f"attendances.{format}"
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
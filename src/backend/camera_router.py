@@ -0,0 +1,150 @@
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+import logging
+import sys
+import os
+import threading
+from urllib.parse import urlsplit
+
+# Modül yolunu ayarlama
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.config import SessionLocal
+from backend.camera_scheduler import CAMERA_FPS, CameraScheduler, CameraSource
+from backend.face_recognition_router import recognize_image, record_attendances
+
+logger = logging.getLogger(__name__)
+
+# Açılışta başlatılacak kameralar: "kimlik=adres" çiftleri, ";" ile ayrılır
+# örn. CAMERA_SOURCES="giris=rtsp://10.0.0.5/stream1;koridor=/data/test_videos/koridor.mp4"
+CAMERA_SOURCES = os.getenv("CAMERA_SOURCES", "")
+# POST /cameras ile eklenebilecek ek kaynaklar: adres önekleri veya video dizinleri, ";" ile ayrılır
+# (CAMERA_SOURCES'taki adresler her zaman eklenebilir)
+# örn. CAMERA_ALLOWED_SOURCES="rtsp://10.0.0.5/;/data/test_videos"
+CAMERA_ALLOWED_SOURCES = os.getenv("CAMERA_ALLOWED_SOURCES", "")
+# Kameralardan yoklama kaydı için gereken en düşük güven skoru
+CAMERA_MIN_CONFIDENCE = float(os.getenv("CAMERA_MIN_CONFIDENCE", "0.65"))
+
+router = APIRouter(
+    prefix="/cameras",
+    tags=["cameras"],
+    responses={404: {"description": "Not found"}},
+)
+
+class CameraSourceCreate(BaseModel):
+    camera_id: str
+    url: str
+    fps: float = CAMERA_FPS
+    loop: bool = False
+    motion_threshold: float = 2.0
+
+camera_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def _record_recognitions(camera_id: str, people):
+    """Kameralardan tanınan kişiler için yoklama kaydı oluştur"""
+    recognitions = {}
+    for person in people:
+        if person["confidence"] >= CAMERA_MIN_CONFIDENCE:
+            recognitions[person["name"]] = max(person["confidence"], recognitions.get(person["name"], 0.0))
+    if not recognitions:
+        return
+    db = SessionLocal()
+    try:
+        for person_info in record_attendances(db, recognitions):
+            if person_info["attendance_status"] == "recorded":
+                logger.info(f"{camera_id}: {person_info['name']} yoklaması alındı")
+    finally:
+        db.close()
+
+def get_camera_scheduler() -> CameraScheduler:
+    """Paylaşılan kamera zamanlayıcısını oluştur veya mevcut olanı döndür"""
+    global camera_scheduler
+    with _scheduler_lock:
+        if camera_scheduler is None:
+            camera_scheduler = CameraScheduler(recognize_image, on_result=_record_recognitions)
+        return camera_scheduler
+
+def _configured_sources():
+    """CAMERA_SOURCES'taki (kimlik, adres) çiftleri"""
+    sources = []
+    for entry in filter(None, (item.strip() for item in CAMERA_SOURCES.split(";"))):
+        camera_id, _, url = entry.partition("=")
+        if not url:
+            logger.error(f"Geçersiz kamera tanımı: {entry}")
+            continue
+        sources.append((camera_id.strip(), url.strip()))
+    return sources
+
+def _matches(allowed: str, url: str) -> bool:
+    """Adres izin verilen öneke (aynı şema, sunucu ve port; yol altında) ya da dizine uyuyor mu"""
+    if "://" in allowed:
+        allowed_parts, parts = urlsplit(allowed), urlsplit(url)
+        try:
+            same_host = (allowed_parts.hostname, allowed_parts.port) == (parts.hostname, parts.port)
+        except ValueError:
+            return False
+        return (
+            allowed_parts.scheme == parts.scheme and same_host and not parts.username
+            and parts.path.startswith(allowed_parts.path)
+        )
+    if "://" in url:
+        return False
+    # Yerel dosyalar: sembolik bağlantı ve ".." çözüldükten sonra dizinin altında olmalı
+    directory, path = os.path.realpath(allowed), os.path.realpath(url)
+    return os.path.commonpath([directory, path]) == directory
+
+def is_allowed_source(url: str) -> bool:
+    """Kaynak yapılandırmada tanımlı mı (istemci rastgele dosya ya da adres açtıramasın)"""
+    if url in {configured for _, configured in _configured_sources()}:
+        return True
+    allowed = filter(None, (item.strip() for item in CAMERA_ALLOWED_SOURCES.split(";")))
+    return any(_matches(prefix, url) for prefix in allowed)
+
+def start_configured_cameras():
+    """CAMERA_SOURCES ile tanımlanan kameraları başlat"""
+    for camera_id, url in _configured_sources():
+        get_camera_scheduler().add_source(CameraSource(camera_id, url))
+
+def shutdown_cameras():
+    if camera_scheduler is not None:
+        camera_scheduler.shutdown()
+
+@router.get("/")
+def get_cameras():
+    """Kameraların işleme hızı, gecikme ve atılan kare istatistikleri"""
+    return get_camera_scheduler().stats()
+
+@router.post("/")
+def add_camera(camera: CameraSourceCreate):
+    """Yeni kamera ekle (sadece CAMERA_SOURCES ya da CAMERA_ALLOWED_SOURCES'taki kaynaklar)"""
+    if camera.fps <= 0:
+        raise HTTPException(status_code=400, detail="fps pozitif olmalı")
+    if not is_allowed_source(camera.url):
+        raise HTTPException(status_code=403, detail="Kamera kaynağına izin verilmiyor")
+    source = CameraSource(
+        camera.camera_id,
+        camera.url,
+        fps=camera.fps,
+        loop=camera.loop,
+        motion_threshold=camera.motion_threshold
+    )
+    try:
+        get_camera_scheduler().add_source(source)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return source.stats()
+
+@router.get("/{camera_id}")
+def get_camera(camera_id: str):
+    """Tek kameranın istatistikleri"""
+    source = get_camera_scheduler().sources.get(camera_id)
+    if source is None:
+        raise HTTPException(status_code=404, detail="Kamera bulunamadı")
+    return source.stats()
+
+@router.delete("/{camera_id}")
+def remove_camera(camera_id: str):
+    """Kamerayı durdur ve kaldır"""
+    if not get_camera_scheduler().remove_source(camera_id):
+        raise HTTPException(status_code=404, detail="Kamera bulunamadı")
+    return {"message": "Kamera kaldırıldı"}
@@ -0,0 +1,301 @@
+import cv2
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Modül yolunu ayarlama
+sys.path.append(str(Path(__file__).parent.parent))
+from ai_module.frame import Frame
+from ai_module.motion_gate import MotionGate
+
+logger = logging.getLogger(__name__)
+
+# Kameralar arasında paylaşılan tanıma işçisi sayısı
+CAMERA_WORKERS = int(os.getenv("CAMERA_WORKERS", "2"))
+# Kamera başına varsayılan işleme hızı (kare/sn)
+CAMERA_FPS = float(os.getenv("CAMERA_FPS", "2"))
+# Gecikme arttığında inilebilecek en düşük işleme hızı
+CAMERA_MIN_FPS = float(os.getenv("CAMERA_MIN_FPS", "0.2"))
+
+class CameraSource:
+    """Bir kamerayı (RTSP adresi ya da yerel video dosyası) ayrı bir iş parçacığında okuyan kaynak
+
+    Okuyucu sadece en son kareyi tutar; sırası geldiği halde işlenmeden üzerine yazılan
+    kareler atılmış sayılır.
+    Yerel video dosyaları kamera gibi davranması için kendi fps değerinde okunur.
+    """
+
+    def __init__(self, camera_id: str, url: str, fps: float = CAMERA_FPS, loop: bool = False,
+                 motion_threshold: float = 2.0, reconnect_delay: float = 5.0):
+        self.camera_id = camera_id
+        self.url = url
+        self.target_fps = fps
+        self.effective_fps = fps  # Yük altında düşürülen gerçek işleme hızı
+        self.loop = loop
+        self.reconnect_delay = reconnect_delay
+        self.motion_gate = MotionGate(threshold=motion_threshold)
+        self.is_file = os.path.exists(url)
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._frame = None
+        self._frame_time = 0.0
+        self._sequence = 0  # Okunan son karenin sıra numarası
+        self._taken = 0  # İşlemeye alınan son karenin sıra numarası
+
+        self.in_flight = False
+        self.next_due = 0.0
+        self.ready_since = 0.0  # Önceki karenin işlenmesinin bittiği an
+        self.finished = False
+        self.last_error = None
+        self.frames_read = 0
+        self.frames_processed = 0
+        self.frames_dropped = 0
+        self.last_lag = 0.0
+        self.average_lag = 0.0
+        self._completed = deque(maxlen=50)  # Son işlenen karelerin bitiş zamanları
+
+    def start(self):
+        self.ready_since = time.monotonic()
+        self._thread = threading.Thread(target=self._read_loop, name=f"camera-{self.camera_id}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    def _open(self):
+        cap = cv2.VideoCapture(self.url)
+        if not cap.isOpened():
+            raise IOError(f"Kamera açılamadı: {self.url}")
+        if not self.is_file:
+            # Sürücü tamponunu küçült; eski kareler birikmesin
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return cap
+
+    def _read_loop(self):
+        while not self._stop.is_set():
+            try:
+                cap = self._open()
+            except IOError as e:
+                self.last_error = str(e)
+                logger.error(str(e))
+                if self.is_file:
+                    break
+                self._stop.wait(self.reconnect_delay)
+                continue
+
+            frame_interval = 1.0 / (cap.get(cv2.CAP_PROP_FPS) or 25.0)
+            next_read = time.monotonic()
+            try:
+                while not self._stop.is_set():
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    self._publish(frame)
+
+                    if self.is_file:
+                        # Dosyayı gerçek zamanlı oynat (canlı kamerayı taklit et)
+                        next_read += frame_interval
+                        self._stop.wait(max(0.0, next_read - time.monotonic()))
+            finally:
+                cap.release()
+
+            if self.is_file and not self.loop:
+                break
+            if not self.is_file:
+                self.last_error = "Kamera bağlantısı koptu, yeniden bağlanılıyor"
+                logger.warning(f"{self.camera_id}: {self.last_error}")
+                self._stop.wait(self.reconnect_delay)
+
+        self.finished = True
+
+    def _publish(self, frame):
+        """Yeni kareyi en son kare olarak sakla"""
+        with self._lock:
+            now = time.monotonic()
+            if self._sequence > self._taken and self._frame_time >= self.next_due:
+                # Sırası gelmiş kare, işçi boşalmadan eskidi (bütçe dışındaki kareler sayılmaz)
+                self.frames_dropped += 1
+            self._frame = frame
+            self._frame_time = now
+            self._sequence += 1
+            self.frames_read += 1
+
+    def has_new_frame(self) -> bool:
+        with self._lock:
+            return self._sequence > self._taken
+
+    def take_frame(self):
+        """İşlenecek en son kareyi ve yakalanma zamanını al"""
+        with self._lock:
+            self._taken = self._sequence
+            return self._frame, self._frame_time
+
+    def complete(self, captured_at: float, waited: float, slowdown: float, speedup: float, max_lag: float):
+        """İşlenen karenin gecikmesine göre işleme hızını uyarla
+
+        waited: kameranın sırası geldikten sonra boş işçi için beklediği süre.
+        """
+        now = time.monotonic()
+        lag = now - captured_at
+        self.last_lag = lag
+        self.average_lag = lag if not self.frames_processed else 0.8 * self.average_lag + 0.2 * lag
+        self.frames_processed += 1
+        self._completed.append(now)
+
+        # İşçi beklemesi kare aralığını ya da sonuç gecikmesi bütçeyi aşıyorsa
+        # işlemci doymuştur; kamerayı daha seyrek örnekle
+        interval = 1.0 / self.effective_fps
+        if waited > interval or lag > max(max_lag, interval):
+            self.effective_fps = max(CAMERA_MIN_FPS, self.effective_fps * slowdown)
+        else:
+            self.effective_fps = min(self.target_fps, self.effective_fps + self.target_fps * speedup)
+
+    def throughput(self) -> float:
+        """Son işlenen karelere göre saniyedeki işleme sayısı"""
+        if len(self._completed) < 2:
+            return 0.0
+        span = time.monotonic() - self._completed[0]
+        return (len(self._completed) - 1) / span if span > 0 else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "camera_id": self.camera_id,
+            "url": self.url,
+            "running": not self.finished,
+            "target_fps": self.target_fps,
+            "effective_fps": round(self.effective_fps, 2),
+            "throughput_fps": round(self.throughput(), 2),
+            "lag_ms": round(self.last_lag * 1000, 1),
+            "average_lag_ms": round(self.average_lag * 1000, 1),
+            "frames_read": self.frames_read,
+            "frames_processed": self.frames_processed,
+            "frames_dropped": self.frames_dropped,
+            "frames_unchanged": self.motion_gate.skipped,
+            "last_error": self.last_error
+        }
+
+class CameraScheduler:
+    """Birden çok kameranın karelerini ortak tanıma arka ucuna adil şekilde dağıtan zamanlayıcı
+
+    Her kameranın en fazla bir karesi işlenir; sıradaki kamera döngüsel (round-robin) seçilir
+    ve bir kamera kendi fps bütçesinden daha sık örneklenmez. İşleme gecikmesi bütçeyi
+    aştığında kameranın işleme hızı düşürülür, gecikme azaldıkça yeniden hedefe çıkarılır.
+    """
+
+    def __init__(self, recognize_fn, on_result=None, max_workers: int = CAMERA_WORKERS,
+                 max_lag: float = 2.0, slowdown: float = 0.7, speedup: float = 0.1):
+        self.recognize_fn = recognize_fn
+        self.on_result = on_result
+        self.max_workers = max_workers
+        self.max_lag = max_lag
+        self.slowdown = slowdown
+        self.speedup = speedup
+        self.sources = {}
+        self._order = []
+        self._next = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._slots = threading.Semaphore(max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="camera-recognition")
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._dispatch_loop, name="camera-scheduler", daemon=True)
+            self._thread.start()
+
+    def add_source(self, source: CameraSource):
+        with self._lock:
+            if source.camera_id in self.sources:
+                raise ValueError(f"Kamera zaten ekli: {source.camera_id}")
+            self.sources[source.camera_id] = source
+            self._order.append(source.camera_id)
+        source.start()
+        self.start()
+        self._wakeup.set()
+        logger.info(f"Kamera eklendi: {source.camera_id} ({source.url}, {source.target_fps} fps)")
+
+    def remove_source(self, camera_id: str) -> bool:
+        with self._lock:
+            source = self.sources.pop(camera_id, None)
+            if source is None:
+                return False
+            self._order.remove(camera_id)
+        source.stop()
+        return True
+
+    def _pick_source(self, now: float):
+        """Sırası gelen ve yeni karesi olan ilk kamerayı döngüsel olarak seç"""
+        with self._lock:
+            count = len(self._order)
+            for offset in range(count):
+                index = (self._next + offset) % count
+                source = self.sources[self._order[index]]
+                if source.in_flight or now < source.next_due or not source.has_new_frame():
+                    continue
+                self._next = (index + 1) % count
+                return source
+        return None
+
+    def _dispatch_loop(self):
+        while not self._stop.is_set():
+            # Boş işçi olana kadar bekle; kameralar bu sırada en son karelerini tazeler
+            if not self._slots.acquire(timeout=0.5):
+                continue
+
+            now = time.monotonic()
+            source = self._pick_source(now)
+            if source is None:
+                self._slots.release()
+                self._wakeup.wait(0.01)
+                self._wakeup.clear()
+                continue
+
+            source.in_flight = True
+            waited = now - max(source.next_due, source.ready_since)
+            source.next_due = now + 1.0 / source.effective_fps
+            frame, captured_at = source.take_frame()
+            self._executor.submit(self._process, source, frame, captured_at, waited)
+
+    def _process(self, source: CameraSource, frame, captured_at: float, waited: float):
+        try:
+            frame = Frame(frame, "BGR")
+            if source.motion_gate.should_process(frame):
+                people = self.recognize_fn(frame)
+                if self.on_result is not None and people:
+                    self.on_result(source.camera_id, people)
+            source.complete(captured_at, waited, self.slowdown, self.speedup, self.max_lag)
+        except Exception as e:
+            source.last_error = str(e)
+            logger.error(f"{source.camera_id} kare işleme hatası: {e}")
+        finally:
+            source.ready_since = time.monotonic()
+            source.in_flight = False
+            self._slots.release()
+            self._wakeup.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            sources = list(self.sources.values())
+        return {
+            "workers": self.max_workers,
+            "cameras": [source.stats() for source in sources]
+        }
+
+    def shutdown(self):
+        self._stop.set()
+        for camera_id in list(self.sources):
+            self.remove_source(camera_id)
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        self._executor.shutdown(wait=False)
@@ -1,11 +1,16 @@
+import asyncio
 import logging
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, WebSocket, WebSocketDisconnect
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import datetime
-import numpy as np
 import cv2
 import sys
 import os
+import shutil
+import tempfile
+import threading
+import time
 
 # Logging yapılandırması
 logging.basicConfig(
@@ -17,8 +22,18 @@ logger = logging.getLogger(__name__)
 # Modül yolunu ayarlama
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database import crud, schemas
-from database.config import get_db
+from database.config import get_async_db, SessionLocal
+from database.attendance_cache import presence_cache
 from ai_module.face_recognition import FaceRecognitionSystem
+from ai_module.face_gallery import FaceGallery, embedding_to_bytes
+from ai_module.frame import Frame
+from ai_module.video_sampler import frame_step, sample_frames
+from ai_module.motion_gate import MotionGate
+from ai_module.face_tracker import FaceTracker
+from backend.workers import recognition_executor, run_blocking
+from backend.recognition_pool import (
+    RECOGNITION_PROCESSES, RecognitionPool, ReferenceFaceError, decode_image, extract_reference
+)
 
 router = APIRouter(
     prefix="/face-recognition",
@@ -28,151 +43,283 @@ router = APIRouter(
 
 # Yüz tanıma sistemi örneği
 face_recognition_system = None
+# Çok süreçli tanıma havuzu (RECOGNITION_PROCESSES > 0 ise)
+recognition_pool = None
+_init_lock = threading.Lock()
+
+# Diğer API süreçlerinin yaptığı kayıtların galeriye yansıması için kontrol aralığı (sn)
+GALLERY_REFRESH_SECONDS = float(os.getenv("GALLERY_REFRESH_SECONDS", "5"))
+_gallery_version = None
+_gallery_checked_at = 0.0
+_gallery_lock = threading.Lock()
+
+# Eşzamanlı isteklerin yüzlerini ortak batch'te toplama ayarları
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "32"))
+INFERENCE_MAX_DELAY_MS = float(os.getenv("INFERENCE_MAX_DELAY_MS", "10"))
+
+# Video yüklemeleri için geçici dizin (varsayılan: sistemin geçici dizini) ve kopyalama parça boyutu
+VIDEO_TEMP_DIR = os.getenv("VIDEO_TEMP_DIR") or None
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+def _load_face_records():
+    """Galeri için veritabanındaki yüz vektörlerini getir"""
+    global _gallery_version, _gallery_checked_at
+    db = SessionLocal()
+    try:
+        # Sürüm vektörlerden önce okunur; arada gelen kayıt bir sonraki kontrolde yüklenir
+        _gallery_version = crud.get_face_gallery_version(db)
+        _gallery_checked_at = time.monotonic()
+        return crud.get_all_face_embeddings(db)
+    except Exception as e:
+        logger.warning(f"Yüz vektörleri veritabanından yüklenemedi: {e}")
+        return []
+    finally:
+        db.close()
+
+def refresh_gallery():
+    """Veritabanındaki galeri başka bir süreç tarafından değiştirildiyse yüklü galeriyi yenile
+
+    Her API süreci galeriyi kendi belleğinde tutar; kontrol en fazla GALLERY_REFRESH_SECONDS'ta
+    bir yapılır ve galeri değiştiyse yeniden oluşturulup tek atamayla değiştirilir.
+    """
+    global _gallery_checked_at
+    if face_recognition_system is None and recognition_pool is None:
+        return
+    if time.monotonic() - _gallery_checked_at < GALLERY_REFRESH_SECONDS:
+        return
+    # Aynı anda sadece bir istek kontrol eder; diğerleri mevcut galeriyle devam eder
+    if not _gallery_lock.acquire(blocking=False):
+        return
+    try:
+        _gallery_checked_at = time.monotonic()
+        db = SessionLocal()
+        try:
+            version = crud.get_face_gallery_version(db)
+        finally:
+            db.close()
+        if version == _gallery_version:
+            return
+
+        gallery = FaceGallery(dimension=512)
+        gallery.load(_load_face_records())
+        if face_recognition_system is not None:
+            face_recognition_system.gallery = gallery
+        if recognition_pool is not None:
+            recognition_pool.gallery = gallery
+            recognition_pool.publish_gallery()
+        logger.info(f"Yüz galerisi veritabanından yenilendi: {len(gallery)} kişi")
+    except Exception as e:
+        logger.warning(f"Yüz galerisi yenilenemedi: {e}")
+    finally:
+        _gallery_lock.release()
+
+def advance_gallery_version(versions: tuple = None):
+    """Yüklü galeriye doğrudan uygulanan değişikliğin sürümünü kaydet
+
+    versions: değişiklikten önceki ve sonraki veritabanı sürümü. Galeri değişiklikten önce
+    güncelse yeni sürüm yüklü kabul edilir ve refresh_gallery yeniden oluşturma yapmaz;
+    arada başka bir süreç de değişiklik yaptıysa sürüm ilerletilmez, galeri yenilenir.
+    """
+    global _gallery_version
+    if versions is None:
+        return
+    before, after = versions
+    with _gallery_lock:
+        if _gallery_version == before:
+            _gallery_version = after
 
 def init_face_recognition_system():
     global face_recognition_system
-    if face_recognition_system is None:
-        face_recognition_system = FaceRecognitionSystem()
+    # İstekler havuzda paralel çalıştığı için model yalnızca bir kez yüklenmeli
+    with _init_lock:
+        if face_recognition_system is None:
+            # Galeriyi veritabanındaki yüz vektörlerinden yükle
+            face_recognition_system = FaceRecognitionSystem(face_records=_load_face_records())
+            face_recognition_system.enable_scheduler(
+                max_batch_size=INFERENCE_MAX_BATCH_SIZE,
+                max_delay_ms=INFERENCE_MAX_DELAY_MS
+            )
     return face_recognition_system
 
+def init_recognition_pool():
+    """Çok süreçli tanıma havuzunu başlat; devre dışıysa None döndür"""
+    global recognition_pool
+    if RECOGNITION_PROCESSES <= 0:
+        return None
+    with _init_lock:
+        if recognition_pool is None:
+            gallery = FaceGallery(dimension=512)
+            gallery.load(_load_face_records())
+            recognition_pool = RecognitionPool(RECOGNITION_PROCESSES)
+            recognition_pool.start(gallery)
+    return recognition_pool
+
+def recognize_image(image):
+    """Fotoğrafı (dosya içeriği veya Frame) işçi havuzunda ya da bu süreçte tanı"""
+    pool = init_recognition_pool()
+    refresh_gallery()
+    if pool is not None:
+        if isinstance(image, bytes):
+            return pool.process_image(image)
+        return pool.process_frame(image)
+
+    if isinstance(image, bytes):
+        image = decode_image(image)
+    return init_face_recognition_system().process_image(image)
+
+def remove_from_gallery(user_id: int, versions: tuple = None):
+    """Silinen kullanıcıyı yüklü galeriden çıkar (versions: silmeden önceki ve sonraki galeri sürümü)"""
+    if face_recognition_system is not None:
+        face_recognition_system.gallery.remove(user_id)
+    if recognition_pool is not None and recognition_pool.gallery.remove(user_id):
+        recognition_pool.publish_gallery()
+    advance_gallery_version(versions)
+
+def rename_in_gallery(user_id: int, name: str, versions: tuple = None):
+    """Adı değişen kullanıcının yüklü galerideki etiketini güncelle (versions: remove_from_gallery gibi)"""
+    if face_recognition_system is not None:
+        face_recognition_system.gallery.rename(user_id, name)
+    if recognition_pool is not None and recognition_pool.gallery.rename(user_id, name):
+        recognition_pool.publish_gallery()
+    advance_gallery_version(versions)
+
+def record_attendances(db: Session, recognitions: dict) -> list:
+    """Tanınan kişilerin (isim -> güven skoru) bugünkü yoklamasını toplu kaydet ve durumlarını döndür"""
+    try:
+        results = crud.record_attendances(db, recognitions)
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"Yoklama kaydı oluşturulamadı: {e}")
+        results = {name: ("error", None) for name in recognitions}
+
+    recognized_people = []
+    for name, confidence in recognitions.items():
+        status, attendance_id = results[name]
+        person_info = {
+            "name": name,
+            "confidence": confidence,
+            "attendance_status": status
+        }
+        if status == "recorded":
+            person_info["attendance_id"] = attendance_id
+        elif status == "already_attended":
+            logger.info(f"{name} bugün zaten yoklamaya katılmış")
+        recognized_people.append(person_info)
+    return recognized_people
+
+def attendance_message(recognized_people: list) -> str:
+    """Tanıma sonucu için özet mesaj"""
+    if not recognized_people:
+        return "Yeterli güven skoruna sahip yüz bulunamadı"
+    already_attended = sum(1 for p in recognized_people if p["attendance_status"] == "already_attended")
+    message = f"{len(recognized_people)} kişi tanındı"
+    if already_attended > 0:
+        message += f" ({already_attended} kişi bugün zaten yoklamaya katılmış)"
+    return message
+
 @router.post("/register-face/{user_id}")
 async def register_face(
     user_id: int,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Kullanıcının referans fotoğrafını kaydet"""
+    contents = await file.read()
     try:
         # Kullanıcıyı kontrol et
-        db_user = crud.get_user(db, user_id=user_id)
+        db_user = await db.run_sync(crud.get_user, user_id)
         if db_user is None:
             raise HTTPException(status_code=404, detail="Kullanıcı bulunamadı")
+        name = db_user.name
+        # Çıkarım sürerken bağlantı işlem içinde boşta beklemesin; havuza geri verilir
+        await db.rollback()
 
-        # Dosyayı oku ve numpy dizisine dönüştür
-        contents = await file.read()
-        nparr = np.frombuffer(contents, np.uint8)
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        # Yüzü tespit et, kırp, vektörünü hesapla ve referans fotoğrafını kaydet
+        confidence, embedding = await run_blocking(_extract_reference_face, user_id, name, contents)
 
-        # BGR'dan RGB'ye dönüştür
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        # Yüz vektörünü veritabanına kaydet
+        face_features = schemas.FaceFeaturesCreate(
+            user_id=user_id,
+            embedding=embedding_to_bytes(embedding),
+            confidence_score=confidence
+        )
+        versions = await db.run_sync(_save_face_features, face_features)
 
-        # Yüz tanıma sistemini başlat
-        face_system = init_face_recognition_system()
-
-        # Yüzleri tespit et
-        faces = face_system.detect_faces(image_rgb)
-        if not faces:
-            raise HTTPException(status_code=400, detail="Fotoğrafta yüz bulunamadı")
-
-        # En büyük yüzü al
-        face = max(faces, key=lambda x: x['box'][2] * x['box'][3])
-        if face['confidence'] < 0.98:
-            raise HTTPException(status_code=400, detail="Yüz tespit güveni düşük")
-
-        # Yüz bölgesini kes
-        x, y, w, h = face['box']
-        # Sınırları kontrol et
-        x = max(0, x)
-        y = max(0, y)
-        w = min(w, image_rgb.shape[1] - x)
-        h = min(h, image_rgb.shape[0] - y)
-        
-        face_image = image_rgb[y:y+h, x:x+w]
-        
-        # Yüz görüntüsünü yeniden boyutlandır
-        face_image = cv2.resize(face_image, (224, 224))
-
-        # Referans fotoğrafı olarak kaydet
-        save_path = os.path.join('data', 'test_images', f"{db_user.name}_{user_id}.jpg")
-        os.makedirs(os.path.dirname(save_path), exist_ok=True)
-        cv2.imwrite(save_path, cv2.cvtColor(face_image, cv2.COLOR_RGB2BGR))
+        # Galeriyi yeniden oluşturmadan yeni kişiyi ekle
+        await run_blocking(_add_to_gallery, user_id, name, embedding, versions)
 
         return {
             "message": "Referans fotoğrafı başarıyla kaydedildi",
-            "confidence": face['confidence']
+            "confidence": confidence
         }
 
+    except HTTPException as e:
+        raise e
     except Exception as e:
         logger.error(f"Yüz işleme hatası: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _extract_reference_face(user_id: int, name: str, contents: bytes):
+    """Referans yüzü çıkar ve fotoğrafını kaydet (tanıma havuzunda çalışır)"""
+    pool = init_recognition_pool()
+    try:
+        if pool is not None:
+            confidence, face_image, embedding = pool.extract_reference(contents)
+        else:
+            confidence, face_image, embedding = extract_reference(
+                init_face_recognition_system(), decode_image(contents)
+            )
+    except ReferenceFaceError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.message)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Referans fotoğrafı olarak kaydet
+    save_path = os.path.join('data', 'test_images', f"{name}_{user_id}.jpg")
+    os.makedirs(os.path.dirname(save_path), exist_ok=True)
+    cv2.imwrite(save_path, face_image)
+    return confidence, embedding
+
+def _save_face_features(db: Session, face_features: schemas.FaceFeaturesCreate):
+    """Yüz vektörünü kaydet; kayıttan önceki ve sonraki galeri sürümünü döndür"""
+    before = crud.get_face_gallery_version(db)
+    if crud.get_face_features(db, user_id=face_features.user_id):
+        crud.update_face_features(db, face_features.user_id, face_features)
+    else:
+        crud.create_face_features(db, face_features)
+    after = crud.get_face_gallery_version(db)
+    db.commit()  # Sürüm okumasının açtığı işlemi kapat
+    return before, after
+
+def _add_to_gallery(user_id: int, name: str, embedding, versions: tuple = None):
+    pool = init_recognition_pool()
+    if pool is not None:
+        pool.gallery.add(user_id, name, embedding)
+        pool.publish_gallery()
+    else:
+        init_face_recognition_system().gallery.add(user_id, name, embedding)
+    advance_gallery_version(versions)
+
 @router.post("/recognize")
 async def recognize_face(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     min_confidence: float = 0.65
 ):
     """Gönderilen fotoğraftaki yüzü tanı ve yoklama kaydı oluştur"""
+    contents = await file.read()
     try:
-        # Yüz tanıma sistemini başlat
-        face_system = init_face_recognition_system()
-
-        # Dosyayı oku ve numpy dizisine dönüştür
-        contents = await file.read()
-        nparr = np.frombuffer(contents, np.uint8)
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-
-        # Yüzleri tanı
-        recognized_faces = face_system.process_image(image)
-        if not recognized_faces:
+        # Tanıma havuzda, yoklama kaydı olay döngüsünde (asenkron oturumla) yapılır
+        recognitions = await run_blocking(_recognize_face, contents, min_confidence)
+        if recognitions is None:
             return {"recognized_people": [], "message": "Yüz tespit edilemedi"}
 
-        # Sonuçları formatla ve yoklama kayıtları oluştur
-        recognized_people = []
-        for face in recognized_faces:
-            # Güven skoru kontrolü
-            if face["confidence"] < min_confidence:
-                logger.warning(f"Düşük güven skoru ({face['confidence']:.2f}) - {face['name']}")
-                continue
-
-            person_info = {
-                "name": face["name"],
-                "confidence": face["confidence"],
-                "attendance_status": "not_recorded"
-            }
-            
-            try:
-                # Kullanıcıyı bul
-                db_user = crud.get_user_by_name(db, name=face["name"])
-                if db_user:
-                    # Bugünkü yoklamaları kontrol et
-                    today = datetime.utcnow()
-                    daily_attendances = crud.get_daily_attendances(db, today)
-                    user_attended = any(att.user_id == db_user.id for att in daily_attendances)
-                    
-                    if user_attended:
-                        person_info["attendance_status"] = "already_attended"
-                        logger.info(f"{face['name']} bugün zaten yoklamaya katılmış")
-                    else:
-                        # Yeni yoklama kaydı oluştur
-                        attendance = schemas.AttendanceCreate(
-                            user_id=db_user.id,
-                            check_in_time=today,
-                            confidence_score=face["confidence"],
-                            status="present"
-                        )
-                        db_attendance = crud.create_attendance(db, attendance)
-                        person_info["attendance_id"] = db_attendance.id
-                        person_info["attendance_status"] = "recorded"
-            except Exception as e:
-                logger.warning(f"Yoklama kaydı oluşturulamadı: {e}")
-                person_info["attendance_status"] = "error"
-                
-            recognized_people.append(person_info)
-
-        # Sonuç mesajını hazırla
-        if not recognized_people:
-            message = "Yeterli güven skoruna sahip yüz bulunamadı"
-        else:
-            new_records = sum(1 for p in recognized_people if p["attendance_status"] == "recorded")
-            already_attended = sum(1 for p in recognized_people if p["attendance_status"] == "already_attended")
-            message = f"{len(recognized_people)} kişi tanındı"
-            if already_attended > 0:
-                message += f" ({already_attended} kişi bugün zaten yoklamaya katılmış)"
+        # Yoklama kayıtlarını tek seferde oluştur
+        recognized_people = await db.run_sync(record_attendances, recognitions)
 
         return {
             "recognized_people": recognized_people,
-            "message": message,
+            "message": attendance_message(recognized_people),
             "min_confidence": min_confidence
         }
 
@@ -180,69 +327,116 @@ async def recognize_face(
         logger.error(f"Yüz tanıma hatası: {e}")
         return {"recognized_people": [], "error": str(e)}
 
+def _recognize_face(contents: bytes, min_confidence: float):
+    """Fotoğraftaki yüzleri tanı; isim -> güven skoru, yüz yoksa None (tanıma havuzunda çalışır)"""
+    recognized_faces = recognize_image(contents)
+    if not recognized_faces:
+        return None
+
+    # Güven skoru yeterli yüzleri topla (aynı kişi birden çok kez görünürse en yüksek skor)
+    recognitions = {}
+    for face in recognized_faces:
+        # Güven skoru kontrolü
+        if face["confidence"] < min_confidence:
+            logger.warning(f"Düşük güven skoru ({face['confidence']:.2f}) - {face['name']}")
+            continue
+        recognitions[face["name"]] = max(face["confidence"], recognitions.get(face["name"], 0.0))
+    return recognitions
+
 @router.post("/recognize-video")
 async def recognize_video(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     min_confidence: float = 0.60,  # Güven skorunu düşürdük
     frame_interval: int = 1,       # Her frame'i işle
     max_frames: int = 30,          # Daha fazla frame işle
-    timeout_seconds: int = 10
+    timeout_seconds: int = 10,
+    frames_per_second: float = None,  # Verilirse videonun her saniyesinden bu kadar kare işlenir
+    motion_threshold: float = 2.0     # Değişmeyen karelerde tespiti atla (0: kapalı)
 ):
+    # Yükleme belleğe okunmaz; işçi onu parça parça geçici dosyaya kopyalar
+    result = await run_blocking(
+        _recognize_video, file.file, min_confidence, frame_interval, max_frames, timeout_seconds,
+        frames_per_second, motion_threshold
+    )
+    recognized_faces = result.pop("recognized_faces", None)
+    if not recognized_faces:
+        return result
+
     try:
-        temp_file = f"temp_video_{datetime.utcnow().timestamp()}.mp4"
-        
-        with open(temp_file, "wb") as buffer:
-            buffer.write(await file.read())
+        recognized_people = await db.run_sync(record_attendances, recognized_faces)
+    except Exception as e:
+        logger.error(f"Video işleme hatası: {e}")
+        return {"recognized_people": [], "error": str(e), "should_stop": True}
+
+    return {
+        "recognized_people": recognized_people,
+        "message": attendance_message(recognized_people),
+        **result
+    }
+
+def _spool_upload(upload) -> str:
+    """Yüklenen videoyu sabit boyutlu parçalarla geçici dizine kopyala ve yolunu döndür"""
+    upload.seek(0)
+    with tempfile.NamedTemporaryFile(
+        prefix="temp_video_", suffix=".mp4", dir=VIDEO_TEMP_DIR, delete=False
+    ) as buffer:
+        shutil.copyfileobj(upload, buffer, UPLOAD_CHUNK_SIZE)
+        return buffer.name
+
+def _recognize_video(
+    upload,
+    min_confidence: float,
+    frame_interval: int,
+    max_frames: int,
+    timeout_seconds: int,
+    frames_per_second: float = None,
+    motion_threshold: float = 2.0
+):
+    """Video tanımanın engelleyen kısmı (tanıma havuzunda çalışır)
+
+    Tanınan kişiler recognized_faces (isim -> güven skoru) olarak döner; yoklama çağıran tarafta yazılır.
+    """
+    temp_file = None
+    try:
+        temp_file = _spool_upload(upload)
         
-        face_system = init_face_recognition_system()
         cap = cv2.VideoCapture(temp_file)
         if not cap.isOpened():
             return {"recognized_people": [], "message": "Video açılamadı", "should_stop": True}
             
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         processed_frames = 0
-        frame_count = 0
         start_time = datetime.utcnow()
         recognized_faces = {}
-        found_face = False  # Yüz bulunduğunda işlemi durdurmak için flag
+        motion_gate = MotionGate(threshold=motion_threshold)
         
-        actual_interval = max(1, min(frame_interval, total_frames // max_frames))
+        # Saniye başına kare hedefi verilmişse ona göre, yoksa frame_interval ile örnekle
+        actual_interval = frame_step(cap, every_n=frame_interval, frames_per_second=frames_per_second)
+        if not frames_per_second:
+            actual_interval = max(1, min(actual_interval, total_frames // max_frames))
         logger.info(f"Frame atlama aralığı: {actual_interval}")
         
-        while frame_count < total_frames and not found_face:  # found_face kontrolü ekledik
+        for frame_index, frame in sample_frames(cap, step=actual_interval, max_frames=max_frames):
             if (datetime.utcnow() - start_time).seconds > timeout_seconds:
                 logger.warning("Video işleme zaman aşımına uğradı")
                 break
                 
-            if processed_frames >= max_frames:
-                logger.info("Maksimum frame sayısına ulaşıldı")
-                break
+            processed_frames += 1
+            frame = Frame(frame, "BGR")
             
-            ret, frame = cap.read()
-            if not ret:
-                break
-                
-            frame_count += 1
-            if frame_count % actual_interval != 0:
+            # Önceki işlenen kareden beri sahne değişmediyse tanıma sonucu da değişmez
+            if not motion_gate.should_process(frame):
                 continue
-                
-            processed_frames += 1
-            logger.info(f"Frame işleniyor: {processed_frames}/{max_frames} (Video frame: {frame_count}/{total_frames})")
+            logger.info(f"Frame işleniyor: {processed_frames}/{max_frames} (Video frame: {frame_index + 1}/{total_frames})")
             
-            faces = face_system.process_image(frame)
-            if faces:
-                for face in faces:
-                    name = face["name"]
-                    confidence = face["confidence"]
-                    if confidence >= min_confidence:  # Güven skoru yeterliyse
-                        recognized_faces[name] = confidence
-                        logger.info(f"Yüz tanındı: {name} (Güven: {confidence:.2f})")
-                        found_face = True  # Yüz bulundu, döngüyü sonlandır
-                        break
-                
-                if found_face:  # İç döngüden çıktıktan sonra da kontrol et
-                    break
+            faces = recognize_image(frame)
+            # Güven skoru yeterli ilk yüz bulunduğunda işlemi durdur
+            face = next((f for f in faces if f["confidence"] >= min_confidence), None)
+            if face:
+                recognized_faces[face["name"]] = face["confidence"]
+                logger.info(f"Yüz tanındı: {face['name']} (Güven: {face['confidence']:.2f})")
+                break
         
         cap.release()
         
@@ -251,57 +445,15 @@ async def recognize_video(
                 "recognized_people": [],
                 "message": "Videoda yüz tespit edilemedi",
                 "processed_frames": processed_frames,
+                "skipped_frames": motion_gate.skipped,
                 "should_stop": True
             }
 
-        recognized_people = []
-        for name, confidence in recognized_faces.items():
-            person_info = {
-                "name": name,
-                "confidence": confidence,
-                "attendance_status": "not_recorded"
-            }
-            
-            try:
-                db_user = crud.get_user_by_name(db, name=name)
-                if db_user:
-                    today = datetime.utcnow()
-                    daily_attendances = crud.get_daily_attendances(db, today)
-                    user_attended = any(att.user_id == db_user.id for att in daily_attendances)
-                    
-                    if user_attended:
-                        person_info["attendance_status"] = "already_attended"
-                        logger.info(f"{name} bugün zaten yoklamaya katılmış")
-                    else:
-                        attendance = schemas.AttendanceCreate(
-                            user_id=db_user.id,
-                            check_in_time=today,
-                            confidence_score=confidence,
-                            status="present"
-                        )
-                        db_attendance = crud.create_attendance(db, attendance)
-                        person_info["attendance_id"] = db_attendance.id
-                        person_info["attendance_status"] = "recorded"
-            except Exception as e:
-                logger.warning(f"Yoklama kaydı oluşturulamadı: {e}")
-                person_info["attendance_status"] = "error"
-                
-            recognized_people.append(person_info)
-
-        if not recognized_people:
-            message = "Yeterli güven skoruna sahip yüz bulunamadı"
-        else:
-            new_records = sum(1 for p in recognized_people if p["attendance_status"] == "recorded")
-            already_attended = sum(1 for p in recognized_people if p["attendance_status"] == "already_attended")
-            message = f"{len(recognized_people)} kişi tanındı"
-            if already_attended > 0:
-                message += f" ({already_attended} kişi bugün zaten yoklamaya katılmış)"
-
         return {
-            "recognized_people": recognized_people,
-            "message": message,
+            "recognized_faces": recognized_faces,
             "min_confidence": min_confidence,
             "processed_frames": processed_frames,
+            "skipped_frames": motion_gate.skipped,
             "total_frames": total_frames,
             "should_stop": True
         }
@@ -314,5 +466,144 @@ async def recognize_video(
             "should_stop": True  # Hata durumunda da videoyu durdur
         }
     finally:
-        if os.path.exists(temp_file):
-            os.remove(temp_file) 
\ No newline at end of file
+        if temp_file and os.path.exists(temp_file):
+            os.remove(temp_file)
+
+class StreamSession:
+    """WebSocket bağlantısına özel izleme durumu (izler, hareket kapısı, bildirilen kişiler)"""
+
+    def __init__(self, min_confidence: float, motion_threshold: float):
+        self.min_confidence = min_confidence
+        self.tracker = FaceTracker()
+        self.motion_gate = MotionGate(threshold=motion_threshold)
+        self.announced_tracks = set()
+        self.attendance_by_name = {}
+
+    def _track_faces(self, frame):
+        """Kareyi izle; sadece tanınması gereken izleri modelden geçir"""
+        pool = init_recognition_pool()
+        refresh_gallery()
+        if pool is not None:
+            # İşçi havuzu tüm hattı çalıştırır; izleyici sadece sonuçları ilişkilendirir
+            people = pool.process_frame(frame)
+            for (track, _), person in zip(self.tracker.update([p["box"] for p in people]), people):
+                track.record(person["name"], person["confidence"])
+            return
+
+        face_system = init_face_recognition_system()
+        faces = face_system.extract_faces(frame, min_confidence=0.85, margin_ratio=0.1)
+        tracked = self.tracker.update([face["box"] for face in faces])
+        pending = [(face, track) for face, (track, needed) in zip(faces, tracked) if needed]
+        results = face_system.match_faces([face for face, _ in pending])
+        for (_, track), result in zip(pending, results):
+            track.record(*(result or (None, 0.0)))
+
+    def process(self, contents: bytes):
+        """JPEG kareyi işle ve gönderilecek olayları döndür (tanıma havuzunda çalışır)
+
+        Bozuk ya da işlenemeyen kare bağlantıyı kapatmaz; hata olayı olarak bildirilir.
+        """
+        try:
+            return self._process(contents)
+        except Exception as e:
+            logger.warning(f"Kamera akışı karesi işlenemedi: {e}")
+            return [{"type": "error", "message": str(e)}]
+
+    def _process(self, contents: bytes):
+        frame = decode_image(contents)
+        if not self.motion_gate.should_process(frame):
+            return []
+
+        self._track_faces(frame)
+
+        events = []
+        recognitions = {}
+        for track in self.tracker.tracks:
+            if track.misses or track.name is None or track.confidence < self.min_confidence:
+                continue
+            if track.id not in self.announced_tracks:
+                self.announced_tracks.add(track.id)
+                events.append({
+                    "type": "recognition",
+                    "track_id": track.id,
+                    "name": track.name,
+                    "confidence": track.confidence,
+                    "box": [int(v) for v in track.box]
+                })
+            # Her kişi için bağlantı başına bir kez yoklama kaydı
+            if track.name not in self.attendance_by_name:
+                recognitions[track.name] = max(track.confidence, recognitions.get(track.name, 0.0))
+
+        if not recognitions:
+            return events
+
+        # Bağlantı boyunca değil, sadece kayıt sırasında veritabanı bağlantısı tutulur
+        db = SessionLocal()
+        try:
+            for person_info in record_attendances(db, recognitions):
+                self.attendance_by_name[person_info["name"]] = person_info
+                events.append({"type": "attendance", **person_info})
+        finally:
+            db.close()
+        return events
+
+@router.websocket("/stream")
+async def recognition_stream(
+    websocket: WebSocket,
+    min_confidence: float = 0.65,
+    motion_threshold: float = 2.0
+):
+    """Sürekli gönderilen JPEG karelerini tanı, tanıma ve yoklama olaylarını anında geri gönder
+
+    İşlenmeyi bekleyen kare varken yeni kare gelirse eskisi atılır (kuyruk yerine en güncel kare).
+    """
+    await websocket.accept()
+    session = StreamSession(min_confidence, motion_threshold)
+    latest = {"frame": None, "received": 0, "dropped": 0}
+    frame_ready = asyncio.Event()
+
+    async def receive_frames():
+        while True:
+            data = await websocket.receive_bytes()
+            latest["received"] += 1
+            if latest["frame"] is not None:
+                latest["dropped"] += 1  # Eski kare hiç işlenmeden yerine yenisi geldi
+            latest["frame"] = data
+            frame_ready.set()
+
+    async def process_frames():
+        while True:
+            await frame_ready.wait()
+            frame_ready.clear()
+            data, latest["frame"] = latest["frame"], None
+            if data is None:
+                continue
+            for event in await run_blocking(session.process, data):
+                await websocket.send_json(event)
+
+    tasks = [asyncio.create_task(receive_frames()), asyncio.create_task(process_frames())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            task.result()
+    except WebSocketDisconnect:
+        logger.info(
+            f"Kamera akışı kapandı: {latest['received']} kare alındı, {latest['dropped']} kare atıldı, "
+            f"{session.motion_gate.skipped} kare hareketsiz"
+        )
+    except Exception as e:
+        logger.error(f"Kamera akışı hatası: {e}")
+    finally:
+        for task in tasks:
+            task.cancel()
+
+@router.get("/queue")
+async def get_queue_status():
+    """Tanıma havuzunun ve toplu çıkarım kuyruğunun durumunu getir"""
+    status = recognition_executor.stats()
+    if face_recognition_system is not None and face_recognition_system.scheduler is not None:
+        status["inference_pending"] = face_recognition_system.scheduler.pending
+    if recognition_pool is not None:
+        status["process_pool"] = recognition_pool.stats()
+    status["presence_cache"] = presence_cache.stats()
+    return status
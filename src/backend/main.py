@@ -1,4 +1,5 @@
 from fastapi import FastAPI, Depends, HTTPException
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 import sys
 import os
@@ -9,6 +10,7 @@ from fastapi.middleware.cors import CORSMiddleware
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database import crud, models, schemas
 from database.config import engine, get_db
+from database.attendance_cache import attendance_day
 from backend.face_recognition_router import router as face_recognition_router
 
 # Veritabanı tablolarını oluştur
@@ -86,7 +88,15 @@ def create_attendance(
     db_user = crud.get_user(db, user_id=attendance.user_id)
     if db_user is None:
         raise HTTPException(status_code=404, detail="Kullanıcı bulunamadı")
-    return crud.create_attendance(db=db, attendance=attendance)
+    duplicate = HTTPException(status_code=400, detail="Kullanıcının bu gün için yoklaması zaten var")
+    if crud.has_attended(db, attendance.user_id, attendance_day(attendance.check_in_time)):
+        raise duplicate
+    try:
+        return crud.create_attendance(db=db, attendance=attendance)
+    except IntegrityError:
+        # Kontrolden sonra aynı gün için başka bir kayıt araya girdi
+        db.rollback()
+        raise duplicate
 
 @app.get("/users/{user_id}/attendances/", response_model=list[schemas.Attendance])
 def read_user_attendances(
@@ -105,8 +115,8 @@ def read_daily_attendances(
 ):
     try:
         # Tarih formatını kontrol et ve datetime nesnesine dönüştür
-        attendance_date = datetime.strptime(date, "%Y-%m-%d")
-        attendances = crud.get_daily_attendances(db, date=attendance_date)
+        attendance_date = datetime.strptime(date, "%Y-%m-%d").date()
+        attendances = crud.get_daily_attendances(db, day=attendance_date)
         return attendances
     except ValueError:
         raise HTTPException(status_code=400, detail="Geçersiz tarih formatı. Beklenen format: YYYY-MM-DD")
@@ -0,0 +1,24 @@
+import base64
+from datetime import datetime
+from fastapi import HTTPException
+
+# Sonraki sayfanın imleci bu başlıkta döner; yoksa son sayfadır
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+MAX_PAGE_SIZE = 1000
+
+def encode_cursor(check_in_time: datetime, record_id: int) -> str:
+    """(check_in_time, id) anahtarını URL'de taşınabilir bir imlece çevir"""
+    raw = f"{check_in_time.isoformat()}|{record_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str):
+    """İmleci (check_in_time, id) anahtarına çevir"""
+    try:
+        check_in_time, record_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(check_in_time), int(record_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Geçersiz sayfa imleci")
+
+def check_page_size(limit: int):
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit 1 ile {MAX_PAGE_SIZE} arasında olmalı")
@@ -0,0 +1,169 @@
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import numpy as np
+import cv2
+
+# Modül yolunu ayarlama
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ai_module.face_gallery import FaceGallery
+from ai_module.frame import Frame
+
+logger = logging.getLogger(__name__)
+
+# Tanıma işçi süreç sayısı (0: tanıma API sürecinde yapılır)
+RECOGNITION_PROCESSES = int(os.getenv("RECOGNITION_PROCESSES", "0"))
+# İşçilerin bellek eşlemeli okuduğu galeri dosyalarının dizini
+GALLERY_SNAPSHOT_DIR = Path(os.getenv(
+    "GALLERY_SNAPSHOT_DIR",
+    os.path.join(tempfile.gettempdir(), "yoklama_gallery")
+))
+
+class ReferenceFaceError(Exception):
+    """Referans fotoğrafı kayda uygun olmadığında fırlatılır"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message, status_code)
+        self.message = message
+        self.status_code = status_code
+
+def extract_reference(face_system, image):
+    """Referans fotoğraftaki en büyük yüzü kırp ve vektörünü hesapla
+
+    Kırpma payı ve ön işleme tanımayla aynıdır (varsayılan margin, oran korunarak boyutlandırma);
+    galeri ve sorgu vektörleri aynı şekilde çerçevelenmiş yüzlerden hesaplanır.
+    """
+    faces = face_system.extract_faces(image, min_confidence=0.0)
+    if not faces:
+        raise ReferenceFaceError("Fotoğrafta yüz bulunamadı")
+
+    # En büyük yüzü al
+    face = max(faces, key=lambda x: x['box'][2] * x['box'][3])
+    if face['confidence'] < 0.98:
+        raise ReferenceFaceError("Yüz tespit güveni düşük")
+
+    # Yeniden boyutlandırma get_embedding içindeki ön işlemede (oran korunarak) yapılır
+    face_image = face['face']
+
+    embedding = face_system.get_embedding(face_image)
+    if embedding is None:
+        raise ReferenceFaceError("Yüz vektörü hesaplanamadı", status_code=500)
+
+    return face['confidence'], face_image, embedding
+
+def decode_image(contents: bytes):
+    """Yüklenen dosyayı BGR Frame'e dönüştür; görüntü çözülemezse ValueError fırlatır"""
+    nparr = np.frombuffer(contents, np.uint8)
+    image = cv2.imdecode(nparr, cv2.IMREAD_COLOR) if nparr.size else None
+    if image is None:
+        raise ValueError("Görüntü çözülemedi")
+    return Frame(image, "BGR")
+
+# İşçi süreç durumu
+_worker_system = None
+_worker_snapshot_dir = None
+_worker_snapshot_mtime = None
+
+def _init_worker(snapshot_dir: str):
+    """Her işçi süreçte modeli bir kez yükle"""
+    global _worker_system, _worker_snapshot_dir
+    from ai_module.face_recognition import FaceRecognitionSystem
+
+    _worker_snapshot_dir = Path(snapshot_dir)
+    _worker_system = FaceRecognitionSystem(gallery=_load_snapshot())
+    logger.info(f"Tanıma işçisi hazır (pid {os.getpid()})")
+
+def _load_snapshot():
+    """Galeri dosyaları değiştiyse bellek eşlemeli olarak yeniden aç"""
+    global _worker_snapshot_mtime
+    try:
+        mtime = os.stat(_worker_snapshot_dir / "gallery.json").st_mtime_ns
+    except OSError:
+        return None
+    if mtime == _worker_snapshot_mtime:
+        return None
+    _worker_snapshot_mtime = mtime
+    return FaceGallery.from_snapshot(_worker_snapshot_dir)
+
+def _worker():
+    """Güncel galeriyle işçinin tanıma sistemini döndür"""
+    gallery = _load_snapshot()
+    if gallery is not None:
+        _worker_system.gallery = gallery
+    return _worker_system
+
+def _worker_process_image(contents: bytes):
+    return _worker().process_image(decode_image(contents))
+
+def _worker_process_frame(frame: np.ndarray):
+    return _worker().process_image(Frame(frame, "BGR"))
+
+def _worker_extract_reference(contents: bytes):
+    return extract_reference(_worker(), decode_image(contents))
+
+class RecognitionPool:
+    """Her süreçte ayrı model örneği çalıştıran tanıma işçi havuzu
+
+    Yüklenen dosyalar sıkıştırılmış halde gönderilir; video kareleri ise ham dizi olarak
+    pickle'lanıp süreçler arası borudan kopyalanır (kare başına bir kopya). Galeri işçiler
+    arasında bellek eşlemeli dosyadan paylaşılır.
+    """
+
+    def __init__(self, processes: int, snapshot_dir: Path = GALLERY_SNAPSHOT_DIR):
+        self.processes = processes
+        self.snapshot_dir = Path(snapshot_dir)
+        self.gallery = None
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def start(self, gallery: FaceGallery):
+        """Galeriyi yayınla ve işçi süreçleri başlat"""
+        self.gallery = gallery
+        self.publish_gallery()
+        # TensorFlow fork ile güvenli değil; işçiler temiz süreçte başlatılır
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(str(self.snapshot_dir),)
+        )
+        logger.info(f"Tanıma işçi havuzu başlatıldı: {self.processes} süreç")
+
+    def publish_gallery(self):
+        """Galerinin güncel halini işçilerin okuyacağı dosyalara yaz"""
+        with self._lock:
+            self.gallery.save_snapshot(self.snapshot_dir)
+
+    def _call(self, func, *args):
+        """İşi bir işçiye gönder ve sonucunu bekle (çağıran iş parçacığı sonuç gelene kadar bekler)"""
+        with self._lock:
+            self._pending += 1
+        try:
+            return self._executor.submit(func, *args).result()
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def process_image(self, contents: bytes):
+        return self._call(_worker_process_image, contents)
+
+    def process_frame(self, frame):
+        image = frame.bgr if isinstance(frame, Frame) else frame
+        return self._call(_worker_process_frame, image)
+
+    def extract_reference(self, contents: bytes):
+        return self._call(_worker_extract_reference, contents)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"processes": self.processes, "pending": self._pending}
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import sys
 import os
 from pathlib import Path
@@ -9,6 +9,8 @@ from pathlib import Path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database import crud, schemas
 from database.config import get_db
+from backend.face_recognition_router import remove_from_gallery, rename_in_gallery
+from backend.pagination import NEXT_CURSOR_HEADER, check_page_size
 
 router = APIRouter(
     prefix="/users",
@@ -17,9 +19,22 @@ router = APIRouter(
 )
 
 @router.get("/", response_model=List[schemas.User])
-def get_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Tüm kullanıcıları getir"""
-    users = crud.get_users(db, skip=skip, limit=limit)
+def get_users(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """Tüm kullanıcıları id sırasıyla getir
+
+    Sonraki sayfa için X-Next-Cursor başlığındaki değer cursor olarak gönderilir
+    (skip eski istemciler için korunur; derin sayfalarda yavaştır).
+    """
+    check_page_size(limit)
+    users = crud.get_users(db, skip=skip, limit=limit, after_id=cursor)
+    if len(users) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = str(users[-1].id)
     return users
 
 @router.post("/", response_model=schemas.User)
@@ -41,15 +56,19 @@ def get_user(user_id: int, db: Session = Depends(get_db)):
 @router.put("/{user_id}", response_model=schemas.User)
 def update_user(user_id: int, user: schemas.UserCreate, db: Session = Depends(get_db)):
     """Kullanıcı bilgilerini güncelle"""
+    version = crud.get_face_gallery_version(db)
     db_user = crud.update_user(db, user_id=user_id, user=user)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
+    rename_in_gallery(user_id, db_user.name, (version, crud.get_face_gallery_version(db)))
     return db_user
 
 @router.delete("/{user_id}")
 def delete_user(user_id: int, db: Session = Depends(get_db)):
     """Kullanıcıyı sil"""
+    version = crud.get_face_gallery_version(db)
     success = crud.delete_user(db, user_id=user_id)
     if not success:
         raise HTTPException(status_code=404, detail="User not found")
+    remove_from_gallery(user_id, (version, crud.get_face_gallery_version(db)))
     return {"message": "User deleted successfully"} 
\ No newline at end of file
@@ -0,0 +1,70 @@
+import asyncio
+import threading
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+# Modül yolunu ayarlama
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.recognition_pool import RECOGNITION_PROCESSES
+
+# Ağır CV/ML işlemleri için iş parçacığı havuzu boyutu
+# Süreç havuzu açıkken her iş sonucu beklerken bir iş parçacığını tutar; tüm süreçlerin dolu
+# kalabilmesi için süreç başına iki iş parçacığı (biri çalışan, biri sıradaki iş) ayrılır
+RECOGNITION_THREADS = max(int(os.getenv("RECOGNITION_THREADS", "4")), 2 * RECOGNITION_PROCESSES)
+
+class BlockingExecutor:
+    """Engelleyen işleri olay döngüsü dışında, sınırlı bir havuzda çalıştıran yardımcı"""
+
+    def __init__(self, max_workers: int, name: str):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._running = 0
+
+    def _track(self, func):
+        """İşin başlangıç ve bitişini sayaçlara yansıt"""
+        with self._lock:
+            self._running += 1
+        try:
+            return func()
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._submitted -= 1
+
+    def _discard(self, future):
+        """Başlamadan iptal edilen işi (bekleyen görev iptal edildiğinde) kuyruktan düş"""
+        if future.cancelled():
+            with self._lock:
+                self._submitted -= 1
+
+    async def run(self, func, *args, **kwargs):
+        """Fonksiyonu havuzda çalıştır ve sonucunu bekle"""
+        with self._lock:
+            self._submitted += 1
+        future = self._executor.submit(self._track, partial(func, *args, **kwargs))
+        future.add_done_callback(self._discard)
+        # Bekleyen görev iptal edilirse kuyruktaki iş de iptal edilir; çalışan iş bitince _track sayar
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict:
+        """Havuz ve kuyruk durumunu döndür"""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "running": self._running,
+                "queued": self._submitted - self._running
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+# Tanıma uç noktalarının ortak havuzu
+recognition_executor = BlockingExecutor(RECOGNITION_THREADS, "recognition")
+
+async def run_blocking(func, *args, **kwargs):
+    """Engelleyen işi tanıma havuzunda çalıştır"""
+    return await recognition_executor.run(func, *args, **kwargs)
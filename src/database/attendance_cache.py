@@ -0,0 +1,138 @@
+import os
+import threading
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Optional, Tuple
+from zoneinfo import ZoneInfo
+from sqlalchemy.orm import Session
+from . import models
+
+# Yoklama gününün belirlendiği saat dilimi (gün bu saat diliminde gece yarısı değişir)
+ATTENDANCE_TIMEZONE = ZoneInfo(os.getenv("ATTENDANCE_TIMEZONE", "UTC"))
+
+def attendance_day(moment: Optional[datetime] = None) -> date:
+    """Verilen (UTC, saat dilimsiz) zamanın yoklama günü; zaman verilmezse bugün"""
+    moment = moment or datetime.utcnow()
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(ATTENDANCE_TIMEZONE).date()
+
+def day_start(day: date) -> datetime:
+    """Yoklama gününün başlangıcı (UTC, saat dilimsiz; check_in_time ile karşılaştırılabilir)"""
+    local_midnight = datetime.combine(day, time.min, tzinfo=ATTENDANCE_TIMEZONE)
+    return local_midnight.astimezone(timezone.utc).replace(tzinfo=None)
+
+def day_end(day: date) -> datetime:
+    """Yoklama gününün bitişi (ertesi günün başlangıcı, hariç)"""
+    return day_start(day + timedelta(days=1))
+
+class PresenceCache:
+    """Bugün yoklaması alınmış kullanıcıların bellekteki kümesi
+
+    İlk kullanımda veritabanından doldurulur, yoklama yazan crud fonksiyonlarıyla
+    güncellenir ve gün değiştiğinde (ATTENDANCE_TIMEZONE'a göre) sıfırlanır. Böylece aynı
+    öğrencinin tekrar görülmesi veritabanına gitmeden "zaten katıldı" olarak yanıtlanır.
+    Sadece bugün tutulur; geçmiş günlerin sorguları doğrudan veritabanına gider.
+
+    Önbellek yalnızca "katıldı" bilgisini kesin kabul eder: başka bir süreç kayıt açtıysa
+    eksik kalan kişi veritabanındaki kullanıcı+gün kısıtına takılır ve yine doğru yanıtlanır.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.day = None
+        self.warmed = False
+        self.attendance_ids = {}  # Kullanıcı id -> bugünkü yoklama id
+        self.user_ids = {}  # İsim -> kullanıcı id (sadece bugün katılmış ve adı çözülmüş kişiler)
+        self.hits = 0
+        self.misses = 0
+
+    def _roll_over(self, today: date):
+        if self.day != today:
+            self.day = today
+            self.warmed = False
+            self.attendance_ids = {}
+            self.user_ids = {}
+
+    def _ensure(self, db: Session, day: date) -> bool:
+        """Gün bugünse önbelleği hazırla; değilse False
+
+        Veritabanı sorgusu kilit dışında yapılır ve sonuç kilit altında birleştirilir: asenkron
+        oturumda (run_sync) sorgu olay döngüsünü bekletir, kilidi tutarken bekleyen bir istek
+        aynı kilidi isteyen diğer isteklerle birlikte döngüyü kilitlerdi.
+        """
+        with self._lock:
+            today = attendance_day()
+            self._roll_over(today)
+            if day != today:
+                return False
+            if self.warmed:
+                return True
+
+        rows = db.query(models.Attendance.user_id, models.Attendance.id).filter(
+            models.Attendance.check_in_date == day
+        ).all()
+        with self._lock:
+            if self.day == day and not self.warmed:
+                # Sorgu sırasında add ile gelen kayıtlar korunur
+                self.attendance_ids = {**dict(rows), **self.attendance_ids}
+                self.warmed = True
+        return True
+
+    def lookup(self, db: Session, day: date, name: str) -> Optional[Tuple[int, int]]:
+        """İsim bugün katılmış olarak biliniyorsa (kullanıcı id, yoklama id) döndür"""
+        if not self._ensure(db, day):
+            return None
+        with self._lock:
+            if day != self.day:
+                return None
+            user_id = self.user_ids.get(name)
+            if user_id is not None and user_id in self.attendance_ids:
+                self.hits += 1
+                return user_id, self.attendance_ids[user_id]
+            self.misses += 1
+            return None
+
+    def attended(self, db: Session, day: date, user_ids) -> Optional[Dict[int, int]]:
+        """Verilen kullanıcılardan bugün katılmış olanlar (gün bugün değilse None)"""
+        if not self._ensure(db, day):
+            return None
+        with self._lock:
+            if day != self.day:
+                return None
+            return {user_id: self.attendance_ids[user_id] for user_id in user_ids if user_id in self.attendance_ids}
+
+    def add(self, day: date, attendances: Dict[int, int], names: Dict[str, int] = None):
+        """Yazılan (veya katıldığı görülen) yoklamaları önbelleğe ekle"""
+        with self._lock:
+            if day != self.day:
+                return
+            self.attendance_ids.update(attendances)
+            for name, user_id in (names or {}).items():
+                if user_id in self.attendance_ids:
+                    self.user_ids[name] = user_id
+
+    def clear(self):
+        """Önbelleği boşalt (bir sonraki kullanımda veritabanından yeniden doldurulur)"""
+        with self._lock:
+            self.day = None
+            self.warmed = False
+            self.attendance_ids = {}
+            self.user_ids = {}
+
+    def forget_user(self, user_id: int):
+        """Silinen veya adı değişen kullanıcıyı önbellekten çıkar"""
+        with self._lock:
+            self.attendance_ids.pop(user_id, None)
+            self.user_ids = {name: uid for name, uid in self.user_ids.items() if uid != user_id}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "day": self.day.isoformat() if self.day else None,
+                "present": len(self.attendance_ids),
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+# Süreç genelinde paylaşılan önbellek
+presence_cache = PresenceCache()
@@ -0,0 +1,80 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Tuple
+from sqlalchemy.orm import Session
+from . import models
+from .upsert import upsert
+
+def week_start(day: date) -> date:
+    """Günün ait olduğu haftanın pazartesisi"""
+    return day - timedelta(days=day.weekday())
+
+def apply_attendances(db: Session, attendances: List[dict]):
+    """Yeni yazılan yoklamaları günlük ve haftalık özetlere yansıt (commit etmez)
+
+    Her yoklama (user_id, check_in_date, check_in_time, status, confidence_score) içerir.
+    Günlük satır doğrudan yazılır; etkilenen haftalar sadece o haftanın günlük
+    satırlarından (en fazla 7 satır) yeniden hesaplanır, böylece işlem tekrarlansa da sonuç değişmez.
+    """
+    if not attendances:
+        return
+
+    upsert(db, models.AttendanceDailySummary.__table__, [
+        {
+            "user_id": attendance["user_id"],
+            "day": attendance["check_in_date"],
+            "status": attendance["status"],
+            "first_check_in": attendance["check_in_time"],
+            "confidence_score": attendance["confidence_score"],
+            "updated_at": datetime.utcnow()
+        }
+        for attendance in attendances
+    ], ["user_id", "day"])
+
+    refresh_weeks(db, {(attendance["user_id"], week_start(attendance["check_in_date"])) for attendance in attendances})
+
+def refresh_weeks(db: Session, keys: Iterable[Tuple[int, date]]):
+    """Verilen (kullanıcı, hafta başı) çiftlerinin haftalık özetini günlük özetlerden yeniden hesapla"""
+    keys = set(keys)
+    if not keys:
+        return
+
+    daily = models.AttendanceDailySummary
+    user_ids = {user_id for user_id, _ in keys}
+    first_week = min(week for _, week in keys)
+    last_week = max(week for _, week in keys)
+
+    totals = defaultdict(lambda: {"present": 0, "late": 0, "absent": 0, "first_check_in": None, "confidences": []})
+    for user_id, day, status, first_check_in, confidence in db.query(
+        daily.user_id, daily.day, daily.status, daily.first_check_in, daily.confidence_score
+    ).filter(
+        daily.user_id.in_(user_ids),
+        daily.day >= first_week,
+        daily.day < last_week + timedelta(days=7)
+    ):
+        key = (user_id, week_start(day))
+        if key not in keys:
+            continue
+        total = totals[key]
+        if status in ("present", "late", "absent"):
+            total[status] += 1
+        if first_check_in is not None and (total["first_check_in"] is None or first_check_in < total["first_check_in"]):
+            total["first_check_in"] = first_check_in
+        if confidence is not None and status != "absent":
+            total["confidences"].append(confidence)
+
+    upsert(db, models.AttendanceWeeklySummary.__table__, [
+        {
+            "user_id": user_id,
+            "week_start": week,
+            "present_days": total["present"],
+            "late_days": total["late"],
+            "absent_days": total["absent"],
+            "first_check_in": total["first_check_in"],
+            "average_confidence": (
+                sum(total["confidences"]) / len(total["confidences"]) if total["confidences"] else None
+            ),
+            "updated_at": datetime.utcnow()
+        }
+        for (user_id, week), total in totals.items()
+    ], ["user_id", "week_start"])
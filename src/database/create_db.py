@@ -1,28 +1,34 @@
-import psycopg2
-from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
-from sqlalchemy import create_engine
+from sqlalchemy import bindparam, inspect, select, text, update
+from sqlalchemy.engine import make_url
 import sys
 import os
 
 # Modül yolunu ayarlama
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from database.config import DATABASE_URL
-from database.models import Base
+from database.config import DATABASE_URL, create_db_engine, is_sqlite
+from database.models import Attendance, Base
+from database.attendance_cache import ATTENDANCE_TIMEZONE, attendance_day
 
 def create_database():
-    # Veritabanı bağlantı bilgileri
-    db_name = "yoklama_db"
-    db_user = "postgres"
-    db_password = "postgres"
-    db_host = "localhost"
-    db_port = "5432"
+    # SQLite dosyası ilk bağlantıda oluşturulur; sunucu gerekmez
+    if is_sqlite(DATABASE_URL):
+        print(f"SQLite kullanılıyor: {make_url(DATABASE_URL).database}")
+        return
+
+    import psycopg2
+    from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+    # Veritabanı bağlantı bilgileri (DATABASE_URL'den)
+    url = make_url(DATABASE_URL)
+    db_name = url.database
 
     # PostgreSQL sunucusuna bağlanma
     conn = psycopg2.connect(
-        user=db_user,
-        password=db_password,
-        host=db_host,
-        port=db_port
+        user=url.username,
+        password=url.password,
+        host=url.host or "localhost",
+        port=url.port or 5432,
+        dbname="postgres"
     )
     conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
 
@@ -44,17 +50,97 @@ def create_database():
 def create_tables():
     try:
         # SQLAlchemy engine oluşturma
-        engine = create_engine(DATABASE_URL)
-        
+        engine = create_db_engine(DATABASE_URL)
+
         # Tabloları oluşturma
         Base.metadata.create_all(bind=engine)
         print("Tablolar başarıyla oluşturuldu.")
     except Exception as e:
         print(f"Tablolar oluşturulurken hata oluştu: {e}")
 
+def _backfill_check_in_dates(conn, postgres: bool, batch_size: int = 1000):
+    """Eksik yoklama günlerini giriş zamanından (UTC) ATTENDANCE_TIMEZONE'a göre hesapla"""
+    if postgres:
+        conn.execute(text(
+            "UPDATE attendances SET check_in_date = "
+            "(check_in_time AT TIME ZONE 'UTC' AT TIME ZONE :timezone)::date "
+            "WHERE check_in_date IS NULL"
+        ), {"timezone": ATTENDANCE_TIMEZONE.key})
+        return
+
+    # Saat dilimi veritabanı olmayan motorlarda gün Python'da hesaplanır (crud ile aynı kural)
+    table = Attendance.__table__
+    rows = conn.execute(select(table.c.id, table.c.check_in_time).where(table.c.check_in_date.is_(None))).all()
+    statement = update(table).where(table.c.id == bindparam("row_id")).values(check_in_date=bindparam("day"))
+    for start in range(0, len(rows), batch_size):
+        conn.execute(statement, [
+            {"row_id": row_id, "day": attendance_day(check_in_time)}
+            for row_id, check_in_time in rows[start:start + batch_size]
+        ])
+
+def _report_duplicates(duplicates, limit: int = 20):
+    """Aynı gün birden çok yoklaması olan kullanıcıları yazdır"""
+    print(f"{len(duplicates)} kullanıcı-gün için birden çok yoklama kaydı var:")
+    for user_id, check_in_date, count in duplicates[:limit]:
+        print(f"  kullanıcı {user_id}, {check_in_date}: {count} kayıt")
+    if len(duplicates) > limit:
+        print(f"  ... ve {len(duplicates) - limit} tane daha")
+
+def upgrade_attendances():
+    """Eski attendances tablosuna yoklama günü sütununu ve indeksleri ekle (create_all mevcut tabloyu değiştirmez)
+
+    Adımlar tekrar çalıştırılabilir: yarıda kalan ya da durdurulan güncelleme kaldığı yerden devam eder.
+    """
+    try:
+        engine = create_db_engine(DATABASE_URL)
+        postgres = engine.dialect.name == "postgresql"
+        inspector = inspect(engine)
+        columns = {column["name"] for column in inspector.get_columns("attendances")}
+        constraints = {index["name"] for index in inspector.get_indexes("attendances")}
+        constraints |= {constraint["name"] for constraint in inspector.get_unique_constraints("attendances")}
+
+        with engine.begin() as conn:
+            if "check_in_date" not in columns:
+                conn.execute(text("ALTER TABLE attendances ADD COLUMN check_in_date DATE"))
+            _backfill_check_in_dates(conn, postgres)
+            if "uq_attendances_user_day" not in constraints:
+                # Mükerrer kayıtlar silinmez; kullanıcıya bildirilir ve güncelleme durdurulur
+                duplicates = conn.execute(text(
+                    """SELECT user_id, check_in_date, COUNT(*) FROM attendances
+                       GROUP BY user_id, check_in_date HAVING COUNT(*) > 1
+                       ORDER BY user_id, check_in_date"""
+                )).all()
+                if duplicates:
+                    _report_duplicates(duplicates)
+                    raise RuntimeError(
+                        "Kullanıcı başına günde tek yoklama kısıtı eklenemedi. Mükerrer kayıtları "
+                        "inceleyip birleştirin veya silin, ardından betiği yeniden çalıştırın."
+                    )
+                if postgres:
+                    # SQLite mevcut sütunu NOT NULL yapamaz; yeni tablolar modelden doğru oluşur
+                    conn.execute(text("ALTER TABLE attendances ALTER COLUMN check_in_date SET NOT NULL"))
+                conn.execute(text(
+                    "CREATE UNIQUE INDEX uq_attendances_user_day ON attendances (user_id, check_in_date)"
+                ))
+            # Eski iki sütunlu (user_id, check_in_time) indeksin yerini id'yi de içeren indeks alır
+            conn.execute(text("DROP INDEX IF EXISTS ix_attendances_user_check_in"))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_attendances_user_check_in_id "
+                "ON attendances (user_id, check_in_time, id)"
+            ))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_attendances_day_check_in ON attendances (check_in_date, check_in_time)"
+            ))
+        print("Yoklama tablosu güncellendi.")
+    except Exception as e:
+        print(f"Yoklama tablosu güncellenirken hata oluştu: {e}")
+
 if __name__ == "__main__":
     print("Veritabanı oluşturuluyor...")
     create_database()
-    
+
     print("\nTablolar oluşturuluyor...")
-    create_tables() 
\ No newline at end of file
+    create_tables()
+
+    print("\nMevcut tablolar güncelleniyor...")
+    upgrade_attendances()
@@ -1,7 +1,12 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import distinct, func, insert, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, contains_eager
 from . import models, schemas
-from datetime import datetime
-from typing import List, Optional
+from .upsert import dialect_insert
+from . import attendance_summary
+from .attendance_cache import attendance_day, day_end, day_start, presence_cache
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
 
 # User CRUD işlemleri
 def create_user(db: Session, user: schemas.UserCreate) -> models.User:
@@ -21,8 +26,18 @@ def get_user_by_name(db: Session, name: str):
     """İsme göre kullanıcı bul"""
     return db.query(models.User).filter(models.User.name == name).first()
 
-def get_users(db: Session, skip: int = 0, limit: int = 100) -> List[models.User]:
-    return db.query(models.User).offset(skip).limit(limit).all()
+def get_users(db: Session, skip: int = 0, limit: int = 100, after_id: Optional[int] = None) -> List[models.User]:
+    """Kullanıcıları id sırasıyla getir
+
+    after_id verilirse sayfalama anahtar (keyset) ile yapılır: OFFSET'in aksine atlanan
+    satırlar taranmaz, derin sayfalar da birincil anahtar indeksinden sabit sürede okunur.
+    """
+    query = db.query(models.User).order_by(models.User.id)
+    if after_id is not None:
+        query = query.filter(models.User.id > after_id)
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(limit).all()
 
 def update_user(db: Session, user_id: int, user: schemas.UserCreate) -> Optional[models.User]:
     db_user = get_user(db, user_id)
@@ -32,6 +47,7 @@ def update_user(db: Session, user_id: int, user: schemas.UserCreate) -> Optional
         db_user.updated_at = datetime.utcnow()
         db.commit()
         db.refresh(db_user)
+        presence_cache.forget_user(user_id)  # İsim değişmiş olabilir
     return db_user
 
 def delete_user(db: Session, user_id: int) -> bool:
@@ -39,6 +55,7 @@ def delete_user(db: Session, user_id: int) -> bool:
     if db_user:
         db.delete(db_user)
         db.commit()
+        presence_cache.forget_user(user_id)
         return True
     return False
 
@@ -63,21 +80,185 @@ def update_face_features(db: Session, user_id: int, face_features: schemas.FaceF
         db.refresh(db_face_features)
     return db_face_features
 
+def get_all_face_embeddings(db: Session) -> List[tuple]:
+    """Tüm kayıtlı yüz vektörlerini kullanıcı adlarıyla birlikte tek sorguda getir"""
+    return db.query(models.User.id, models.User.name, models.FaceFeatures.embedding).join(
+        models.FaceFeatures, models.FaceFeatures.user_id == models.User.id
+    ).all()
+
+def get_face_gallery_version(db: Session) -> tuple:
+    """Galerinin güncelliğini gösteren değer: yüz vektörü sayısı ve vektörlerin/isimlerin son güncellenme zamanı
+
+    Başka bir API süreci kişi ekler, siler ya da adını değiştirirse bu değer değişir.
+    """
+    return tuple(db.query(
+        func.count(models.FaceFeatures.id),
+        func.max(models.FaceFeatures.updated_at),
+        func.max(models.User.updated_at)
+    ).join(models.User, models.User.id == models.FaceFeatures.user_id).one())
+
 # Attendance CRUD işlemleri
 def create_attendance(db: Session, attendance: schemas.AttendanceCreate) -> models.Attendance:
+    """Yoklama kaydı oluştur; kullanıcının o gün kaydı varsa IntegrityError fırlatır"""
     db_attendance = models.Attendance(**attendance.model_dump())
+    db_attendance.check_in_date = attendance_day(attendance.check_in_time)
     db.add(db_attendance)
+    db.flush()
+    attendance_summary.apply_attendances(db, [{
+        "user_id": db_attendance.user_id,
+        "check_in_date": db_attendance.check_in_date,
+        "check_in_time": db_attendance.check_in_time,
+        "status": db_attendance.status,
+        "confidence_score": db_attendance.confidence_score
+    }])
     db.commit()
     db.refresh(db_attendance)
+    presence_cache.add(db_attendance.check_in_date, {db_attendance.user_id: db_attendance.id})
     return db_attendance
 
+def has_attended(db: Session, user_id: int, day: date) -> bool:
+    """Kullanıcının verilen gün yoklaması var mı (kullanıcı+gün tekil indeksinden okunur)"""
+    return db.query(
+        db.query(models.Attendance.id).filter(
+            models.Attendance.user_id == user_id,
+            models.Attendance.check_in_date == day
+        ).exists()
+    ).scalar()
+
+def _insert_attendances(db: Session, rows: List[dict]) -> Dict[int, int]:
+    """Yoklamaları "varsa atla" (ON CONFLICT DO NOTHING) ile ekle; eklenenler için kullanıcı id -> yoklama id
+
+    Aynı anda gelen iki istek aynı kişiyi kaydetmeye çalışırsa veritabanındaki
+    kullanıcı+gün kısıtı ikincisini sessizce atlar.
+    """
+    table = models.Attendance.__table__
+    insert_fn = dialect_insert(db, returning=True)
+    if insert_fn is not None:
+        statement = insert_fn(table).values(rows).on_conflict_do_nothing(
+            index_elements=["user_id", "check_in_date"]
+        ).returning(table.c.user_id, table.c.id)
+        return dict(db.execute(statement).all())
+
+    # Diğer veritabanları ve eski SQLite: her satırı kendi savepoint'inde dene
+    inserted = {}
+    for row in rows:
+        try:
+            with db.begin_nested():
+                inserted[row["user_id"]] = db.execute(insert(table).values(row)).inserted_primary_key[0]
+        except IntegrityError:
+            pass
+    return inserted
+
+def record_attendances(
+    db: Session,
+    recognitions: Dict[str, float],
+    check_in_time: Optional[datetime] = None,
+    status: str = "present"
+) -> Dict[str, Tuple[str, Optional[int]]]:
+    """Tanınan kişilerin (isim -> güven skoru) yoklamasını toplu kaydet
+
+    Bugün katıldığı bilinen kişiler veritabanına hiç gitmeden yanıtlanır (presence_cache).
+    Kalan isimler tek sorguda kullanıcıya çevrilir, o gün yoklaması olanlar tek sorguda
+    bulunur ve yeni kayıtlar tek işlemde (commit) eklenir. Her isim için (durum, yoklama id)
+    döner; durum "recorded", "already_attended" ya da kullanıcı yoksa "not_recorded" olur.
+    """
+    results = {name: ("not_recorded", None) for name in recognitions}
+    check_in_time = check_in_time or datetime.utcnow()
+    day = attendance_day(check_in_time)
+
+    pending = []
+    for name in recognitions:
+        cached = presence_cache.lookup(db, day, name)
+        if cached is not None:
+            results[name] = ("already_attended", cached[1])
+        else:
+            pending.append(name)
+    if not pending:
+        return results
+
+    # Aynı isimde birden çok kullanıcı varsa ilki kullanılır (get_user_by_name gibi)
+    user_ids = {}
+    for user_id, name in db.query(models.User.id, models.User.name).filter(
+        models.User.name.in_(pending)
+    ).order_by(models.User.id):
+        user_ids.setdefault(name, user_id)
+    if not user_ids:
+        return results
+
+    def attended_ids(ids):
+        return dict(db.query(models.Attendance.user_id, models.Attendance.id).filter(
+            models.Attendance.user_id.in_(list(ids)),
+            models.Attendance.check_in_date == day
+        ))
+
+    # Bugün için önbellek (ilk kullanımda veritabanından doldurulur), diğer günler için sorgu
+    attended = presence_cache.attended(db, day, user_ids.values())
+    if attended is None:
+        attended = attended_ids(user_ids.values())
+    rows = [
+        {
+            "user_id": user_id,
+            "check_in_time": check_in_time,
+            "check_in_date": day,
+            "confidence_score": recognitions[name],
+            "status": status
+        }
+        for name, user_id in user_ids.items() if user_id not in attended
+    ]
+
+    if rows:
+        inserted = _insert_attendances(db, rows)
+        # Özet tabloları aynı işlemde güncellenir
+        attendance_summary.apply_attendances(db, [row for row in rows if row["user_id"] in inserted])
+        db.commit()
+        # Kontrolden sonra başka bir istek araya girip kaydettiyse onun kaydını göster
+        raced = [row["user_id"] for row in rows if row["user_id"] not in inserted]
+        if raced:
+            attended.update(attended_ids(raced))
+    else:
+        inserted = {}
+
+    for name, user_id in user_ids.items():
+        if user_id in inserted:
+            results[name] = ("recorded", inserted[user_id])
+        else:
+            results[name] = ("already_attended", attended.get(user_id))
+
+    # Sonraki görülmelerde bu kişiler veritabanına gitmeden yanıtlanır
+    presence_cache.add(day, {**attended, **inserted}, user_ids)
+    return results
+
 def get_attendance(db: Session, attendance_id: int) -> Optional[models.Attendance]:
     return db.query(models.Attendance).filter(models.Attendance.id == attendance_id).first()
 
-def get_user_attendances(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[models.Attendance]:
-    return db.query(models.Attendance).filter(
-        models.Attendance.user_id == user_id
-    ).offset(skip).limit(limit).all()
+def get_user_attendances(
+    db: Session,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    before: Optional[Tuple[datetime, int]] = None,
+    with_user: bool = False
+) -> List[models.Attendance]:
+    """Kullanıcının yoklamalarını en yeni giriş en üstte olacak şekilde getir
+
+    Tarih aralığı (iki gün dahil) veritabanında süzülür. before=(check_in_time, id) verilirse
+    sayfalama anahtar (keyset) ile yapılır ve (user_id, check_in_time, id) indeksinden okunur;
+    böylece eski sayfalar da ilk sayfa kadar hızlıdır.
+    """
+    query = db.query(models.Attendance).filter(models.Attendance.user_id == user_id)
+    if start_date is not None:
+        query = query.filter(models.Attendance.check_in_time >= day_start(start_date))
+    if end_date is not None:
+        query = query.filter(models.Attendance.check_in_time < day_end(end_date))
+    if before is not None:
+        query = query.filter(tuple_(models.Attendance.check_in_time, models.Attendance.id) < tuple_(*before))
+    elif skip:
+        query = query.offset(skip)
+    if with_user:
+        query = query.join(models.Attendance.user).options(contains_eager(models.Attendance.user))
+    return query.order_by(models.Attendance.check_in_time.desc(), models.Attendance.id.desc()).limit(limit).all()
 
 def update_attendance(db: Session, attendance_id: int, attendance: schemas.AttendanceUpdate) -> Optional[models.Attendance]:
     db_attendance = get_attendance(db, attendance_id)
@@ -89,8 +270,103 @@ def update_attendance(db: Session, attendance_id: int, attendance: schemas.Atten
         db.refresh(db_attendance)
     return db_attendance
 
-def get_daily_attendances(db: Session, date: datetime) -> List[models.Attendance]:
-    return db.query(models.Attendance).filter(
-        models.Attendance.check_in_time >= date.replace(hour=0, minute=0, second=0),
-        models.Attendance.check_in_time < date.replace(hour=23, minute=59, second=59)
-    ).all() 
\ No newline at end of file
+def get_daily_attendances(db: Session, day: date, with_user: bool = False) -> List[models.Attendance]:
+    """Günün yoklamalarını en yeni giriş en üstte olacak şekilde getir
+
+    with_user=True ise kullanıcılar aynı sorguda (JOIN) yüklenir; kullanıcısı olmayan kayıtlar atlanır.
+    """
+    if isinstance(day, datetime):
+        day = day.date()
+    query = db.query(models.Attendance).filter(models.Attendance.check_in_date == day)
+    if with_user:
+        query = query.join(models.Attendance.user).options(contains_eager(models.Attendance.user))
+    return query.order_by(models.Attendance.check_in_time.desc(), models.Attendance.id.desc()).all()
+
+def stream_attendances(
+    db: Session,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    user_id: Optional[int] = None,
+    batch_size: int = 1000
+):
+    """Yoklamaları kullanıcı bilgisiyle birlikte batch_size'lık parçalar halinde üret
+
+    Sorgu sunucu taraflı imleçle (stream_results) çalışır; ORM nesnesi oluşturulmaz,
+    her parça düz satırlardan oluşur. Süzme ve sıralama (check_in_date, check_in_time, id)
+    ile yapılır; böylece gün indeksinden okunur ve ilk satır tüm aralık sıralanmadan gelir.
+    """
+    attendance = models.Attendance
+    query = select(
+        attendance.id,
+        attendance.user_id,
+        models.User.name,
+        models.User.surname,
+        models.User.email,
+        attendance.check_in_time,
+        attendance.check_out_time,
+        attendance.confidence_score,
+        attendance.status
+    ).join(models.User, models.User.id == attendance.user_id)
+    if start_date is not None:
+        query = query.where(attendance.check_in_date >= start_date)
+    if end_date is not None:
+        query = query.where(attendance.check_in_date <= end_date)
+    if user_id is not None:
+        query = query.where(attendance.user_id == user_id)
+    query = query.order_by(attendance.check_in_date, attendance.check_in_time, attendance.id)
+
+    result = db.execute(query, execution_options={"stream_results": True, "yield_per": batch_size})
+    yield from result.partitions()
+
+# Yoklama özeti sorguları (özet tablolarından okunur, yoklama tablosu taranmaz)
+def get_daily_summaries(
+    db: Session, start_date: date, end_date: date, user_id: Optional[int] = None
+) -> List[models.AttendanceDailySummary]:
+    summary = models.AttendanceDailySummary
+    query = db.query(summary).filter(summary.day >= start_date, summary.day <= end_date)
+    if user_id is not None:
+        query = query.filter(summary.user_id == user_id)
+    return query.order_by(summary.day, summary.user_id).all()
+
+def get_weekly_summaries(
+    db: Session, start_date: date, end_date: date, user_id: Optional[int] = None
+) -> List[models.AttendanceWeeklySummary]:
+    """Başlangıç ve bitiş günlerinin haftaları dahil haftalık özetler"""
+    summary = models.AttendanceWeeklySummary
+    query = db.query(summary).filter(
+        summary.week_start >= attendance_summary.week_start(start_date),
+        summary.week_start <= attendance_summary.week_start(end_date)
+    )
+    if user_id is not None:
+        query = query.filter(summary.user_id == user_id)
+    return query.order_by(summary.week_start, summary.user_id).all()
+
+def get_attendance_rates(db: Session, start_date: date, end_date: date) -> Tuple[int, List[tuple]]:
+    """Kullanıcı başına katılım sayıları ve aralıktaki ders günü sayısı
+
+    Aralık tam haftalara genişletilir (haftalık özetlerden okunur). Ders günü,
+    aralıkta en az bir yoklama alınmış gün sayısıdır.
+    """
+    weekly = models.AttendanceWeeklySummary
+    daily = models.AttendanceDailySummary
+    first_week = attendance_summary.week_start(start_date)
+    last_week = attendance_summary.week_start(end_date)
+
+    class_days = db.query(func.count(distinct(daily.day))).filter(
+        daily.day >= first_week,
+        daily.day < last_week + timedelta(days=7)
+    ).scalar() or 0
+
+    rows = db.query(
+        models.User.id,
+        models.User.name,
+        models.User.surname,
+        func.sum(weekly.present_days),
+        func.sum(weekly.late_days),
+        func.sum(weekly.absent_days)
+    ).join(weekly, weekly.user_id == models.User.id).filter(
+        weekly.week_start >= first_week,
+        weekly.week_start <= last_week
+    ).group_by(models.User.id, models.User.name, models.User.surname).order_by(models.User.id).all()
+
+    return class_days, rows
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, LargeBinary
+from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey, Float, LargeBinary, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from .config import Base
 
@@ -15,7 +15,7 @@ class User(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # İlişkiler
-    face_features = relationship("FaceFeatures", back_populates="user", uselist=False)
+    face_features = relationship("FaceFeatures", back_populates="user", uselist=False, cascade="all, delete-orphan")
     attendances = relationship("Attendance", back_populates="user")
 
 class FaceFeatures(Base):
@@ -31,12 +31,25 @@ class FaceFeatures(Base):
     # İlişkiler
     user = relationship("User", back_populates="face_features")
 
+def _check_in_date(context):
+    """Yoklama gününü giriş zamanından türet (ATTENDANCE_TIMEZONE'a göre)"""
+    from .attendance_cache import attendance_day
+    return attendance_day(context.get_current_parameters().get("check_in_time"))
+
 class Attendance(Base):
     __tablename__ = "attendances"
+    __table_args__ = (
+        # Kullanıcı başına günde tek yoklama; eşzamanlı istekler çift kayıt açamaz
+        UniqueConstraint("user_id", "check_in_date", name="uq_attendances_user_day"),
+        # Kullanıcı geçmişinin (check_in_time, id) anahtarıyla sayfalanması için
+        Index("ix_attendances_user_check_in_id", "user_id", "check_in_time", "id"),
+        Index("ix_attendances_day_check_in", "check_in_date", "check_in_time"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     check_in_time = Column(DateTime, default=datetime.utcnow)
+    check_in_date = Column(Date, nullable=False, default=_check_in_date)
     check_out_time = Column(DateTime, nullable=True)
     confidence_score = Column(Float)  # Yüz tanıma güven skoru
     status = Column(String)  # present, late, absent
@@ -44,4 +57,33 @@ class Attendance(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # İlişkiler
-    user = relationship("User", back_populates="attendances") 
\ No newline at end of file
+    user = relationship("User", back_populates="attendances") 
+class AttendanceDailySummary(Base):
+    """Kullanıcı başına günlük yoklama özeti (yoklama yazılırken güncellenir)"""
+    __tablename__ = "attendance_daily_summaries"
+    __table_args__ = (
+        Index("ix_attendance_daily_summaries_day", "day"),
+    )
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    status = Column(String)  # present, late, absent
+    first_check_in = Column(DateTime)
+    confidence_score = Column(Float)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class AttendanceWeeklySummary(Base):
+    """Kullanıcı başına haftalık yoklama özeti (hafta pazartesi başlar)"""
+    __tablename__ = "attendance_weekly_summaries"
+    __table_args__ = (
+        Index("ix_attendance_weekly_summaries_week", "week_start"),
+    )
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    week_start = Column(Date, primary_key=True)
+    present_days = Column(Integer, default=0)
+    late_days = Column(Integer, default=0)
+    absent_days = Column(Integer, default=0)
+    first_check_in = Column(DateTime)  # Haftanın ilk girişi
+    average_confidence = Column(Float)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
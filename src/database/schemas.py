@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional, List
 from pydantic import BaseModel, EmailStr
 
@@ -59,6 +59,62 @@ class Attendance(AttendanceBase):
     class Config:
         from_attributes = True
 
+# Yoklama listeleri için kullanıcı bilgisiyle birlikte yoklama
+class AttendanceUser(BaseModel):
+    id: int
+    name: str
+    surname: Optional[str] = None
+    email: Optional[str] = None
+    role: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class AttendanceWithUser(BaseModel):
+    id: int
+    user_id: int
+    user: AttendanceUser
+    check_in_time: datetime
+    check_out_time: Optional[datetime] = None
+    confidence_score: Optional[float] = None
+    status: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+# Yoklama özeti şemaları
+class AttendanceDailySummary(BaseModel):
+    user_id: int
+    day: date
+    status: Optional[str] = None
+    first_check_in: Optional[datetime] = None
+    confidence_score: Optional[float] = None
+
+    class Config:
+        from_attributes = True
+
+class AttendanceWeeklySummary(BaseModel):
+    user_id: int
+    week_start: date
+    present_days: int
+    late_days: int
+    absent_days: int
+    first_check_in: Optional[datetime] = None
+    average_confidence: Optional[float] = None
+
+    class Config:
+        from_attributes = True
+
+class AttendanceRate(BaseModel):
+    user_id: int
+    name: str
+    surname: Optional[str] = None
+    present_days: int
+    late_days: int
+    absent_days: int
+    class_days: int
+    attendance_rate: float
+
 # Genişletilmiş User şeması (ilişkiler dahil)
 class UserWithDetails(User):
     face_features: Optional[FaceFeatures] = None
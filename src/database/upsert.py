@@ -0,0 +1,48 @@
+import sqlite3
+from typing import List
+from sqlalchemy import and_, insert, select, update
+from sqlalchemy.orm import Session
+
+# SQLite ON CONFLICT (upsert) sözdizimini 3.24, RETURNING'i 3.35 sürümünden itibaren destekler
+SQLITE_UPSERT_VERSION = (3, 24, 0)
+SQLITE_RETURNING_VERSION = (3, 35, 0)
+
+def dialect_insert(db: Session, returning: bool = False):
+    """Veritabanının ON CONFLICT destekli insert'ü (PostgreSQL/SQLite), yoksa None
+
+    returning=True ise RETURNING de desteklenmelidir. Eski SQLite sürümlerinde (ör. Ubuntu 18.04'teki
+    3.22) None döner ve çağıran taraf satır satır yedek yola geçer.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+        return postgresql_insert
+    if dialect == "sqlite":
+        required = SQLITE_RETURNING_VERSION if returning else SQLITE_UPSERT_VERSION
+        if sqlite3.sqlite_version_info < required:
+            return None
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        return sqlite_insert
+    return None
+
+def upsert(db: Session, table, rows: List[dict], keys: List[str]):
+    """Satırları ekle; anahtar çakışırsa diğer sütunları güncelle (commit etmez)"""
+    if not rows:
+        return
+    insert_fn = dialect_insert(db)
+    if insert_fn is not None:
+        statement = insert_fn(table).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=keys,
+            set_={column: statement.excluded[column] for column in rows[0] if column not in keys}
+        )
+        db.execute(statement)
+        return
+
+    # Diğer veritabanları: satır satır güncelle, yoksa ekle
+    for row in rows:
+        condition = and_(*(table.c[key] == row[key] for key in keys))
+        if db.execute(select(table.c[keys[0]]).where(condition)).first():
+            db.execute(update(table).where(condition).values(row))
+        else:
+            db.execute(insert(table).values(row))
@@ -1,5 +1,6 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
 import uvicorn
 import sys
 from pathlib import Path
@@ -10,8 +11,16 @@ sys.path.append(str(Path(__file__).parent))
 from backend.face_recognition_router import router as face_recognition_router
 from backend.user_router import router as user_router
 from backend.attendance_router import router as attendance_router
+from backend.camera_router import router as camera_router, start_configured_cameras, shutdown_cameras
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Ortam değişkeninde tanımlı kameraları başlat
+    start_configured_cameras()
+    yield
+    shutdown_cameras()
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS ayarları
 app.add_middleware(
@@ -20,12 +29,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # Sayfalama imleci tarayıcıdan okunabilsin
 )
 
 # Router'ları ekle
 app.include_router(face_recognition_router)
 app.include_router(user_router)
 app.include_router(attendance_router)
+app.include_router(camera_router)
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
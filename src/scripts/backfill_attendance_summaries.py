@@ -0,0 +1,63 @@
+import sys
+import os
+import time
+import argparse
+from datetime import datetime
+from sqlalchemy import select
+
+# Modül yolunu ayarlama
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database import models
+from database.attendance_summary import apply_attendances
+from database.config import SessionLocal, engine
+
+def backfill(start_date=None, end_date=None, batch_size: int = 5000):
+    """Geçmiş yoklamalardan günlük ve haftalık özet tablolarını (yeniden) oluştur
+
+    Yoklamalar sunucu taraflı imleçle batch_size'lık parçalar halinde okunur; her parça
+    ayrı bir işlemde yazılır. Özetler upsert edildiği için komut tekrar çalıştırılabilir.
+    """
+    models.Base.metadata.create_all(bind=engine)
+
+    reader = SessionLocal()
+    writer = SessionLocal()
+    try:
+        attendance = models.Attendance
+        query = select(
+            attendance.user_id,
+            attendance.check_in_date,
+            attendance.check_in_time,
+            attendance.status,
+            attendance.confidence_score
+        ).where(attendance.user_id.isnot(None))
+        if start_date:
+            query = query.where(attendance.check_in_date >= start_date)
+        if end_date:
+            query = query.where(attendance.check_in_date <= end_date)
+        query = query.order_by(attendance.check_in_date, attendance.user_id)
+
+        total = 0
+        start = time.time()
+        result = reader.execute(query, execution_options={"stream_results": True, "yield_per": batch_size})
+        for partition in result.partitions():
+            apply_attendances(writer, [row._asdict() for row in partition])
+            writer.commit()
+            total += len(partition)
+            print(f"{total} yoklama işlendi ({time.time() - start:.1f} sn)")
+
+        print(f"Tamamlandı: {total} yoklama özetlendi")
+    finally:
+        reader.close()
+        writer.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Yoklama özet tablolarını geçmiş kayıtlardan doldur")
+    parser.add_argument("--start-date", type=lambda value: datetime.strptime(value, "%Y-%m-%d").date())
+    parser.add_argument("--end-date", type=lambda value: datetime.strptime(value, "%Y-%m-%d").date())
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    backfill(args.start_date, args.end_date, args.batch_size)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import sys
+import os
+import time
+import argparse
+from pathlib import Path
+import numpy as np
+import cv2
+
+# Modül yolunu ayarlama
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ai_module.face_detectors import create_detector
+from ai_module.frame import Frame
+
+# Test fotoğrafları (her birinde bir yüz var)
+TEST_IMAGES_DIR = Path(__file__).parent.parent / "data" / "test_images"
+
+BACKENDS = ["mtcnn", "haar", "opencv-dnn", "coarse:mtcnn", "coarse:haar"]
+
+def benchmark(backend: str, images, repeats: int):
+    """Dedektörün gecikmesini ve yüz bulma oranını (recall) ölç"""
+    try:
+        detector = create_detector(backend)
+    except Exception as e:
+        print(f"{backend:<15} atlandı: {e}")
+        return
+
+    # İlk çağrıdaki model yükleme süresini ölçüme katma
+    detector.detect(images[0][1])
+
+    latencies = []
+    found = 0
+    for _, frame in images:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            faces = detector.detect(frame)
+            latencies.append((time.perf_counter() - start) * 1000)
+        if faces:
+            found += 1
+
+    latencies = np.array(latencies)
+    print(
+        f"{backend:<15} ortalama: {latencies.mean():7.1f} ms  p95: {np.percentile(latencies, 95):7.1f} ms  "
+        f"recall: {found}/{len(images)} ({found / len(images) * 100:.0f}%)"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Yüz dedektörlerinin gecikme ve recall karşılaştırması")
+    parser.add_argument("--images", type=Path, default=TEST_IMAGES_DIR)
+    parser.add_argument("--backends", nargs="+", default=BACKENDS)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    images = []
+    for path in sorted(args.images.glob("*.jpg")):
+        image = cv2.imread(str(path))
+        if image is not None:
+            images.append((path.name, Frame(image, "BGR")))
+    if not images:
+        print(f"Test fotoğrafı bulunamadı: {args.images}")
+        return
+
+    print(f"{len(images)} fotoğraf, her biri {args.repeats} kez\n")
+    for backend in args.backends:
+        benchmark(backend, images, args.repeats)
+
+if __name__ == "__main__":
+    main()
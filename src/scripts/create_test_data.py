@@ -10,6 +10,7 @@ from database import crud, models, schemas
 from database.config import SessionLocal, engine
 from ai_module.create_test_videos import create_test_videos
 from ai_module.face_recognition import FaceRecognitionSystem
+from ai_module.face_gallery import embedding_to_bytes
 
 # Test kullanıcıları
 TEST_USERS = [
@@ -108,10 +109,16 @@ def create_test_face_features():
             # İlk fotoğrafı kullan
             test_image_path = test_images[0]
 
-            # Yüz özelliklerini oluştur (gerçek sistemde embedding face_system'den elde edilecek)
+            # Yüz vektörünü hesapla
+            embedding = face_system.get_embedding(str(test_image_path))
+            if embedding is None:
+                print(f"Yüz vektörü hesaplanamadı: {user.name} {user.surname}")
+                continue
+
+            # Yüz özelliklerini oluştur
             face_features = schemas.FaceFeaturesCreate(
                 user_id=user.id,
-                embedding=b"test_embedding",
+                embedding=embedding_to_bytes(embedding),
                 confidence_score=0.95
             )
             crud.create_face_features(db, face_features)
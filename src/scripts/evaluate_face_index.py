@@ -0,0 +1,76 @@
+import sys
+import os
+import time
+import argparse
+import numpy as np
+
+# Modül yolunu ayarlama
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ai_module.face_gallery import FaceGallery, embedding_from_bytes
+from ai_module.face_index import BruteForceIndex, IVFIndex, evaluate_recall
+
+def load_embeddings(use_db: bool, size: int, dimension: int = 512):
+    """Veritabanındaki vektörleri veya sentetik vektörleri yükle"""
+    if use_db:
+        from database import crud
+        from database.config import SessionLocal
+
+        db = SessionLocal()
+        try:
+            records = crud.get_all_face_embeddings(db)
+        finally:
+            db.close()
+        vectors = [embedding_from_bytes(data) for _, _, data in records if data and len(data) == dimension * 4]
+        if vectors:
+            return FaceGallery.normalize(np.stack(vectors))
+        print("Veritabanında geçerli vektör bulunamadı, sentetik veri kullanılıyor")
+
+    # Kümelenmiş sentetik vektörler (gerçek yüz vektörlerine benzer dağılım)
+    rng = np.random.default_rng(42)
+    centers = rng.normal(size=(max(1, size // 50), dimension))
+    vectors = centers[rng.integers(0, len(centers), size)] + 0.5 * rng.normal(size=(size, dimension))
+    return FaceGallery.normalize(vectors)
+
+def main():
+    parser = argparse.ArgumentParser(description="IVF indeksinin kesin aramaya göre recall ölçümü")
+    parser.add_argument("--size", type=int, default=20000, help="Sentetik galeri boyutu")
+    parser.add_argument("--queries", type=int, default=500, help="Sorgu sayısı")
+    parser.add_argument("--k", type=int, default=1, help="recall@k")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--db", action="store_true", help="Vektörleri veritabanından oku")
+    args = parser.parse_args()
+
+    vectors = load_embeddings(args.db, args.size)
+    ids = np.arange(len(vectors))
+    print(f"Galeri boyutu: {len(vectors)}")
+
+    exact = BruteForceIndex(vectors.shape[1])
+    exact.add(ids, vectors)
+
+    # Sorgular: galerideki vektörlerin gürültülü kopyaları
+    rng = np.random.default_rng(0)
+    picks = rng.integers(0, len(vectors), args.queries)
+    queries = FaceGallery.normalize(vectors[picks] + 0.02 * rng.normal(size=(args.queries, vectors.shape[1])))
+
+    start = time.perf_counter()
+    for query in queries:
+        exact.search(query, args.k)
+    exact_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    print(f"Kesin arama: {exact_ms:.3f} ms/sorgu")
+
+    ivf = IVFIndex(vectors.shape[1])
+    start = time.perf_counter()
+    ivf.add(ids, vectors)
+    print(f"IVF oluşturma: {time.perf_counter() - start:.2f} s ({ivf.nlist} küme)")
+
+    for nprobe in args.nprobe:
+        ivf.nprobe = nprobe
+        start = time.perf_counter()
+        for query in queries:
+            ivf.search(query, args.k)
+        ivf_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        recall = evaluate_recall(ivf, exact, queries, args.k)
+        print(f"nprobe={nprobe:<3} recall@{args.k}: {recall:.3f}  {ivf_ms:.3f} ms/sorgu")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import sys
+import os
+import time
+import argparse
+from pathlib import Path
+
+# Modül yolunu ayarlama
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.camera_scheduler import CameraScheduler, CameraSource
+
+# Test dosyaları yolu
+DATA_DIR = Path(__file__).parent.parent.parent / "data"
+TEST_VIDEOS_DIR = DATA_DIR / "test_videos"
+
+def print_stats(scheduler):
+    print(f"\n{'kamera':<12} {'hedef':>6} {'gerçek':>7} {'işlenen/sn':>10} {'gecikme':>9} {'işlenen':>8} {'atılan':>7}")
+    for camera in scheduler.stats()["cameras"]:
+        print(
+            f"{camera['camera_id']:<12} {camera['target_fps']:>6.1f} {camera['effective_fps']:>7.2f} "
+            f"{camera['throughput_fps']:>10.2f} {camera['lag_ms']:>7.0f}ms {camera['frames_processed']:>8} "
+            f"{camera['frames_dropped']:>7}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="Test videolarını kamera gibi çalıştırıp zamanlayıcıyı yük altında dene")
+    parser.add_argument("videos", nargs="*", type=Path)
+    parser.add_argument("--cameras", type=int, default=4, help="Videolardan kaç kamera oluşturulacağı")
+    parser.add_argument("--fps", type=float, default=2.0)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=60.0)
+    args = parser.parse_args()
+
+    videos = args.videos or sorted(TEST_VIDEOS_DIR.glob("*.mp4"))
+    if not videos:
+        print(f"Test videosu bulunamadı: {TEST_VIDEOS_DIR}")
+        return
+
+    from backend.face_recognition_router import recognize_image
+
+    def on_result(camera_id, people):
+        names = ", ".join(f"{p['name']} ({p['confidence']:.2f})" for p in people)
+        print(f"[{camera_id}] {names}")
+
+    scheduler = CameraScheduler(recognize_image, on_result=on_result, max_workers=args.workers)
+    for i in range(args.cameras):
+        video_path = videos[i % len(videos)]
+        scheduler.add_source(CameraSource(f"kamera-{i + 1}", str(video_path), fps=args.fps, loop=True))
+
+    start = time.time()
+    try:
+        while time.time() - start < args.duration:
+            time.sleep(5)
+            print_stats(scheduler)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scheduler.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import json
+import time
+import argparse
+import threading
+from pathlib import Path
+import cv2
+from websockets.sync.client import connect
+
+# WebSocket endpoint
+STREAM_URL = "ws://localhost:8000/face-recognition/stream"
+
+# Test dosyaları yolu
+DATA_DIR = Path(__file__).parent.parent.parent / "data"
+TEST_VIDEOS_DIR = DATA_DIR / "test_videos"
+
+def print_events(websocket):
+    """Sunucudan gelen tanıma ve yoklama olaylarını yazdır"""
+    try:
+        for message in websocket:
+            event = json.loads(message)
+            if event["type"] == "recognition":
+                print(f"[tanıma] iz {event['track_id']}: {event['name']} ({event['confidence']:.2f})")
+            elif event["type"] == "attendance":
+                print(f"[yoklama] {event['name']}: {event['attendance_status']}")
+            else:
+                print(f"[{event['type']}] {event}")
+    except Exception:
+        pass  # Bağlantı kapandı
+
+def stream_video(video_path: Path, url: str, fps: float, quality: int):
+    """Videoyu hedef hızda JPEG kareler olarak akıt (kamera benzetimi)"""
+    cap = cv2.VideoCapture(str(video_path))
+    if not cap.isOpened():
+        print(f"Video açılamadı: {video_path}")
+        return
+
+    # Hedef hıza göre bazı kareleri atla
+    video_fps = cap.get(cv2.CAP_PROP_FPS) or fps
+    step = max(1, round(video_fps / fps))
+
+    print(f"\nAkıtılıyor: {video_path.name} ({fps} fps)")
+    print("=" * 50)
+
+    with connect(url, max_size=None) as websocket:
+        receiver = threading.Thread(target=print_events, args=(websocket,), daemon=True)
+        receiver.start()
+
+        sent = 0
+        index = 0
+        start = time.time()
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            index += 1
+            if index % step:
+                continue
+
+            ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+            if ok:
+                websocket.send(encoded.tobytes())
+                sent += 1
+
+            # Gerçek zamanlı hızı koru
+            delay = start + sent / fps - time.time()
+            if delay > 0:
+                time.sleep(delay)
+
+        # Son karelerin sonuçlarını bekle
+        time.sleep(2)
+
+    cap.release()
+    print(f"\n{sent} kare gönderildi ({time.time() - start:.1f} sn)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Test videolarını WebSocket üzerinden canlı akış olarak gönder")
+    parser.add_argument("videos", nargs="*", type=Path)
+    parser.add_argument("--url", default=STREAM_URL)
+    parser.add_argument("--fps", type=float, default=5.0)
+    parser.add_argument("--quality", type=int, default=80)
+    args = parser.parse_args()
+
+    videos = args.videos or sorted(TEST_VIDEOS_DIR.glob("*.mp4"))
+    if not videos:
+        print(f"Test videosu bulunamadı: {TEST_VIDEOS_DIR}")
+        return
+
+    for video_path in videos:
+        stream_video(video_path, args.url, args.fps, args.quality)
+
+if __name__ == "__main__":
+    main()
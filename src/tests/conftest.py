@@ -0,0 +1,27 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+import pytest
+
+# Testler geçici bir SQLite veritabanı kullanır (database.config içe aktarılmadan önce ayarlanmalı)
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db"))
+
+# Modül yolunu ayarlama
+sys.path.append(str(Path(__file__).parent.parent))
+
+@pytest.fixture
+def db():
+    """Her test için boş tablolarla veritabanı oturumu"""
+    from database.config import SessionLocal, engine
+    from database.models import Base
+    from database.attendance_cache import presence_cache
+
+    Base.metadata.create_all(bind=engine)
+    presence_cache.clear()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
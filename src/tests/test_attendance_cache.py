@@ -0,0 +1,24 @@
+from datetime import datetime
+from database import crud, models, schemas
+from database.attendance_cache import attendance_day, presence_cache
+
+def test_clear_reloads_from_database(db):
+    user = crud.create_user(db, schemas.UserCreate(name="Ali", surname="Yılmaz", email="ali@example.com", role="student"))
+    attendance = crud.create_attendance(db, schemas.AttendanceCreate(
+        user_id=user.id,
+        check_in_time=datetime.utcnow(),
+        confidence_score=0.9,
+        status="present"
+    ))
+    today = attendance_day()
+    assert presence_cache.attended(db, today, [user.id]) == {user.id: attendance.id}
+
+    # Önbelleği atlayarak veritabanından sil: temizlenene kadar önbellek eski bilgiyi tutar
+    db.query(models.Attendance).delete()
+    db.commit()
+    assert presence_cache.attended(db, today, [user.id]) == {user.id: attendance.id}
+
+    presence_cache.clear()
+    assert not presence_cache.warmed
+    assert presence_cache.stats()["present"] == 0
+    assert presence_cache.attended(db, today, [user.id]) == {}
@@ -0,0 +1,34 @@
+from datetime import date, datetime
+from database import crud, models, schemas, upsert
+
+def _create_user(db, name):
+    return crud.create_user(db, schemas.UserCreate(name=name, surname="Yılmaz", email=f"{name.lower()}@example.com", role="student"))
+
+def test_has_attended(db):
+    user = _create_user(db, "Ali")
+    crud.create_attendance(db, schemas.AttendanceCreate(
+        user_id=user.id,
+        check_in_time=datetime(2026, 10, 12, 9, 0),
+        confidence_score=0.9,
+        status="present"
+    ))
+
+    assert crud.has_attended(db, user.id, date(2026, 10, 12))
+    assert not crud.has_attended(db, user.id, date(2026, 10, 13))
+
+def test_record_attendances_on_old_sqlite(db, monkeypatch):
+    # Ubuntu 18.04'teki SQLite 3.22: ON CONFLICT ve RETURNING yok, satır satır yedek yol kullanılır
+    monkeypatch.setattr(upsert.sqlite3, "sqlite_version_info", (3, 22, 0))
+    assert upsert.dialect_insert(db) is None
+    ali = _create_user(db, "Ali")
+    _create_user(db, "Ayşe")
+    check_in_time = datetime(2026, 10, 12, 9, 0)
+
+    first = crud.record_attendances(db, {"Ali": 0.9}, check_in_time)
+    second = crud.record_attendances(db, {"Ali": 0.8, "Ayşe": 0.7}, check_in_time)
+
+    assert first["Ali"][0] == "recorded"
+    assert second["Ali"] == ("already_attended", first["Ali"][1])
+    assert second["Ayşe"][0] == "recorded"
+    assert db.query(models.Attendance).filter(models.Attendance.user_id == ali.id).count() == 1
+    assert db.query(models.AttendanceDailySummary).count() == 2
@@ -0,0 +1,53 @@
+import threading
+import numpy as np
+from ai_module.face_gallery import FaceGallery
+
+def _vectors(count, seed):
+    return FaceGallery.normalize(np.random.default_rng(seed).normal(size=(count, 512)))
+
+def test_search_while_adding_and_removing():
+    """Eşzamanlı ekleme/silme sırasında arama yanlış kişiyi döndürmemeli ve hata vermemeli"""
+    stable = _vectors(50, 0)
+    churn = _vectors(200, 1)
+    gallery = FaceGallery(dimension=512)
+    gallery.build({user_id: (f"kisi{user_id}", [vector]) for user_id, vector in enumerate(stable)})
+
+    stop = threading.Event()
+    errors = []
+
+    def mutate():
+        try:
+            while not stop.is_set():
+                for offset, vector in enumerate(churn):
+                    gallery.add(1000 + offset, f"gecici{offset}", vector)
+                for offset in range(len(churn)):
+                    gallery.remove(1000 + offset)
+        except Exception as e:
+            errors.append(e)
+
+    def search():
+        try:
+            for _ in range(30):
+                for user_id, vector in enumerate(stable):
+                    assert gallery.match(vector)[0] == f"kisi{user_id}"
+                for offset, vector in enumerate(churn):
+                    result = gallery.match(vector)
+                    # Vektörün kendisi bulunduysa etiketi de kendi etiketi olmalı
+                    if result is not None and result[1] < 1e-3:
+                        assert result[0] == f"gecici{offset}"
+        except Exception as e:
+            errors.append(e)
+
+    writers = [threading.Thread(target=mutate) for _ in range(2)]
+    readers = [threading.Thread(target=search) for _ in range(4)]
+    for thread in writers + readers:
+        thread.start()
+    for thread in readers:
+        thread.join()
+    stop.set()
+    for thread in writers:
+        thread.join()
+
+    assert not errors, errors[0]
+    assert len(gallery) == 50
+    assert len(gallery.index) == 50
@@ -0,0 +1,25 @@
+from datetime import datetime
+import pytest
+
+# Uygulama tanıma modülünü de yükler; yüz tanıma bağımlılıkları yoksa atlanır
+pytest.importorskip("deepface")
+from fastapi.testclient import TestClient
+from database import crud, schemas
+from backend.main import app
+
+def test_read_daily_attendances(db):
+    user = crud.create_user(db, schemas.UserCreate(name="Ali", surname="Yılmaz", email="ali@example.com", role="student"))
+    crud.create_attendance(db, schemas.AttendanceCreate(
+        user_id=user.id,
+        check_in_time=datetime(2026, 10, 12, 9, 0),
+        confidence_score=0.9,
+        status="present"
+    ))
+
+    client = TestClient(app)
+    response = client.get("/attendances/daily/2026-10-12")
+    assert response.status_code == 200
+    assert [attendance["user_id"] for attendance in response.json()] == [user.id]
+
+    assert client.get("/attendances/daily/2026-10-13").json() == []
+    assert client.get("/attendances/daily/12-10-2026").status_code == 400